@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+from ._loguru import logger
+
+_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="source-refresh")
+_PENDING: set[Hashable] = set()
+_GUARD = threading.Lock()
+
+
+def refresh_in_background(key: Hashable, loader: Callable[..., Any], *args: Any) -> None:
+    """Run ``loader(*args)`` on the refresh pool unless a refresh for ``key`` is already queued."""
+
+    with _GUARD:
+        if key in _PENDING:
+            return
+        _PENDING.add(key)
+
+    def run() -> None:
+        try:
+            loader(*args)
+        except Exception as exc:
+            logger.warning("Background refresh failed for %s: %s", key, exc)
+        finally:
+            with _GUARD:
+                _PENDING.discard(key)
+
+    _POOL.submit(run)
+
+
+@atexit.register
+def _shutdown() -> None:
+    _POOL.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["refresh_in_background"]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pickle
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+from ._loguru import logger
+
+
+class DiskCache:
+    """Small sqlite-backed key/value store with per-entry expiry.
+
+    Survives bot restarts, so quotes, index values, daily MOEX snapshots,
+    histories and CoinGecko/FRED/EDGAR idea sources are not refetched right
+    after a restart.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return repr(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, _ = self.get_with_ttl(key, default)
+        return value
+
+    def get_with_ttl(self, key: Hashable, default: Any = None) -> tuple[Any, float]:
+        """Return ``(value, seconds left)``; ``(default, 0.0)`` for misses and expired entries."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, payload FROM cache WHERE key = ?", (self._key(key),)
+            ).fetchone()
+        remaining = 0.0 if row is None else row[0] - time.time()
+        if remaining <= 0:
+            return default, 0.0
+        try:
+            return pickle.loads(row[1]), remaining
+        except Exception as exc:  # pragma: no cover - corrupted entry
+            logger.warning("Disk cache entry %s unreadable: %s", key, exc)
+            return default, 0.0
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, payload) VALUES (?, ?, ?)",
+                (self._key(key), time.time() + ttl, payload),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+
+@lru_cache(maxsize=None)
+def open_disk_cache(path: Optional[str]) -> Optional[DiskCache]:
+    """Open (once per path) the shared disk cache; ``None`` when disabled or unavailable."""
+
+    if not path:
+        return None
+    try:
+        return DiskCache(path)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Disk cache disabled, cannot open %s: %s", path, exc)
+        return None
+
+
+__all__ = ["DiskCache", "open_disk_cache"]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from ._requests import JSONDecodeError
+
+try:  # pragma: no cover - prefer orjson when available
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    _orjson = None
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def response_json(response: Any) -> Any:
+    """Decode a response body, skipping ``requests``' stdlib-json path when possible.
+
+    Undecodable bodies (an HTML error page served with 200, say) raise
+    ``JSONDecodeError``, a ``RequestException``, so callers' HTTP fallbacks apply.
+    """
+
+    content = getattr(response, "content", None)
+    try:
+        if isinstance(content, (bytes, bytearray)):
+            return loads(content)
+        return response.json()
+    except JSONDecodeError:
+        raise
+    except ValueError as exc:
+        raise JSONDecodeError(
+            getattr(exc, "msg", str(exc)), getattr(exc, "doc", ""), getattr(exc, "pos", 0)
+        ) from exc
+
+
+__all__ = ["loads", "response_json"]
@@ -4,9 +4,12 @@ import json
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+
 try:  # pragma: no cover - prefer real requests when available
     import requests as _real
 except ImportError:  # pragma: no cover - fallback implementation
+    import gzip
     from urllib.error import HTTPError as _UrlHTTPError, URLError
     from urllib.parse import urlencode
     from urllib.request import Request, urlopen
@@ -17,6 +20,9 @@ except ImportError:  # pragma: no cover - fallback implementation
     class HTTPError(RequestException):
         """Raised when HTTP returns non-success status."""
 
+    class JSONDecodeError(RequestException, json.JSONDecodeError):
+        """Raised when a response body is not valid JSON."""
+
     @dataclass
     class Response:
         status_code: int
@@ -38,18 +44,31 @@ except ImportError:  # pragma: no cover - fallback implementation
         full_url = url
         if params:
             full_url = f"{url}?{urlencode(params, doseq=True)}"
-        request = Request(full_url, headers=headers or {})
+        request = Request(full_url, headers={**DEFAULT_HEADERS, **(headers or {})})
         try:
             with urlopen(request, timeout=timeout) as resp:
                 body = resp.read()
+                if resp.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
                 return Response(status_code=resp.status, _body=body)
         except _UrlHTTPError as exc:
             raise HTTPError(str(exc)) from exc
         except URLError as exc:
             raise RequestException(str(exc)) from exc
 else:  # pragma: no cover - direct proxy to real requests
+    from requests.adapters import HTTPAdapter
+
     RequestException = _real.RequestException
     HTTPError = _real.HTTPError
+    JSONDecodeError = _real.exceptions.JSONDecodeError
+
+    # One pooled session for all providers: repeated calls to iss.moex.com,
+    # FRED and EDGAR reuse TCP/TLS connections instead of re-handshaking.
+    session = _real.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    _adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+    session.mount("https://", _adapter)
+    session.mount("http://", _adapter)
 
     def get(
         url: str,
@@ -57,6 +76,6 @@ else:  # pragma: no cover - direct proxy to real requests
         headers: Optional[Dict[str, str]] = None,
         timeout: Optional[float] = None,
     ):
-        return _real.get(url, params=params, headers=headers, timeout=timeout)
+        return session.get(url, params=params, headers=headers, timeout=timeout)
 
     Response = _real.Response
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+_MISSING: Any = object()
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe, size-bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    Expired entries are not returned by :meth:`get` but stay available through
+    :meth:`get_stale` until they are evicted, so callers can fall back to the
+    last known value when a refresh fails. With ``grace`` set, :meth:`lookup`
+    also serves entries up to ``grace`` seconds past expiry for
+    stale-while-revalidate callers.
+
+    Reads take no lock: entries are immutable ``(expires_at, value)`` tuples
+    fetched with a single dict lookup, and the LRU bump is skipped when a
+    writer holds the lock. Only writes and evictions serialize.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+        grace: float = 0.0,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = float(ttl)
+        self.grace = float(grace)
+        self._timer = timer
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _touch(self, key: Hashable) -> None:
+        if self._lock.acquire(blocking=False):
+            try:
+                if key in self._data:
+                    self._data.move_to_end(key)
+            finally:
+                self._lock.release()
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None or self._timer() >= entry[0]:
+            return default
+        self._touch(key)
+        return entry[1]
+
+    def lookup(self, key: Hashable) -> tuple[Optional[V], bool]:
+        """Return ``(value, is_stale)``.
+
+        Misses and entries older than ``ttl + grace`` give ``(None, False)``.
+        """
+
+        entry = self._data.get(key)
+        if entry is None:
+            return None, False
+        expires_at, value = entry
+        now = self._timer()
+        if now < expires_at:
+            self._touch(key)
+            return value, False
+        if now < expires_at + self.grace:
+            return value, True
+        return None, False
+
+    def get_stale(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            elif len(self._data) >= self.maxsize:
+                self.expire()
+                while len(self._data) >= self.maxsize:
+                    self._data.popitem(last=False)
+            self._data[key] = (expires_at, value)
+
+    def pop(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def expire(self) -> None:
+        """Drop every entry whose TTL and grace window have elapsed."""
+
+        cutoff = self._timer() - self.grace
+        with self._lock:
+            for key in [key for key, (expires_at, _) in self._data.items() if cutoff >= expires_at]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: Hashable) -> V:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: V) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+__all__ = ["TTLCache"]
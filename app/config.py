@@ -16,6 +16,8 @@ class Settings(BaseSettings):
     FINNHUB_API_KEY: str | None = None
     HTTP_TIMEOUT_SEC: float = Field(default=5.0, gt=0)
     CACHE_TTL_SEC: int = Field(default=10, ge=1)
+    CACHE_DB_PATH: str = "data/cache.db"
+    QUOTE_WARMUP_SEC: int = Field(default=300, ge=0)
     TINKOFF_FILTER_ENABLED: bool = True
     TINKOFF_UNIVERSE_PATH: str = "data/tbank_universe.yml"
 
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import date, datetime, timezone
 from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
 from typing import Dict, Tuple
@@ -17,8 +18,8 @@ from .formatting import (
     format_idea_plan_details,
 )
 from .ideas import generate_ideas, rank_and_filter
-from .models import User, Contribution
-from .providers import MarketDataError, Quote, get_quote
+from .models import RISK_PROFILES, User, Contribution
+from .providers import MarketDataError, Quote, aget_quote
 from .strategy import propose_allocation
 
 # --- Кнопки главного меню
@@ -29,7 +30,7 @@ MAIN_KB = ReplyKeyboardMarkup(
 )
 
 CANCEL_BTN = "Отмена"
-RISK_CHOICES = ["conservative", "balanced", "aggressive"]
+RISK_CHOICES = list(RISK_PROFILES)
 RISK_KB = ReplyKeyboardMarkup([RISK_CHOICES, [CANCEL_BTN]], resize_keyboard=True)
 CONTRIB_KB = ReplyKeyboardMarkup([[CANCEL_BTN]], resize_keyboard=True)
 ADJUST_KB = ReplyKeyboardMarkup([[CANCEL_BTN]], resize_keyboard=True)
@@ -152,7 +153,7 @@ async def record_manual_contribution(update: Update, ctx: ContextTypes.DEFAULT_T
         s.commit()
         total = load_balance(s, u.user_id)
         try:
-            advice = propose_allocation(amount, risk)
+            advice = await asyncio.to_thread(propose_allocation, amount, risk)
         except (MarketDataError, RequestException) as exc:
             logger.warning(
                 "Allocation unavailable for %s: %s", update.effective_user.id, exc
@@ -174,7 +175,7 @@ async def record_manual_contribution(update: Update, ctx: ContextTypes.DEFAULT_T
 
     if advice:
         try:
-            generated = generate_ideas(risk)
+            generated = await asyncio.to_thread(generate_ideas, risk)
         except Exception as exc:  # pragma: no cover - network failures in prod
             logger.warning("Idea enrichment failed for %s: %s", update.effective_user.id, exc)
             generated = []
@@ -187,36 +188,39 @@ async def record_manual_contribution(update: Update, ctx: ContextTypes.DEFAULT_T
                 (item.ticker.upper(), item.board.upper()): item for item in generated
             }
 
-        for line in advice.plan:
-            if not line.ticker or line.type == "cash":
-                continue
-
-            if line.quote is None:
-                try:
-                    refreshed = get_quote(line.ticker)
-                except MarketDataError as exc:
-                    idea = idea_lookup.get(
-                        (line.ticker.upper(), (line.board or "TQBR").upper())
-                    )
-                    if idea:
-                        quote = _fallback_quote_from_idea(line, idea)
-                        if quote:
-                            continue
-                    logger.warning(
-                        "Quote still unavailable for %s %s: %s",
-                        line.ticker,
-                        line.board or "TQBR",
-                        exc,
-                    )
-                except Exception as exc:  # pragma: no cover
-                    logger.error(
-                        "Unexpected quote retry failure for %s %s: %s",
-                        line.ticker,
-                        line.board or "TQBR",
-                        exc,
-                    )
-                else:
-                    _apply_quote_to_line(line, refreshed)
+        pending = [
+            line
+            for line in advice.plan
+            if line.ticker and line.type != "cash" and line.quote is None
+        ]
+        # Retry the missing quotes concurrently instead of one after another.
+        retried = await asyncio.gather(
+            *(aget_quote(line.ticker) for line in pending), return_exceptions=True
+        )
+        for line, refreshed in zip(pending, retried):
+            if isinstance(refreshed, MarketDataError):
+                idea = idea_lookup.get(
+                    (line.ticker.upper(), (line.board or "TQBR").upper())
+                )
+                if idea:
+                    quote = _fallback_quote_from_idea(line, idea)
+                    if quote:
+                        continue
+                logger.warning(
+                    "Quote still unavailable for %s %s: %s",
+                    line.ticker,
+                    line.board or "TQBR",
+                    refreshed,
+                )
+            elif isinstance(refreshed, BaseException):  # pragma: no cover
+                logger.error(
+                    "Unexpected quote retry failure for %s %s: %s",
+                    line.ticker,
+                    line.board or "TQBR",
+                    refreshed,
+                )
+            else:
+                _apply_quote_to_line(line, refreshed)
 
     if advice:
         for line in advice.plan:
@@ -352,7 +356,7 @@ async def send_ideas(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
             return await update.message.reply_text("Сначала /start", reply_markup=MAIN_KB)
         risk = u.risk or "balanced"
     try:
-        generated = generate_ideas(risk)
+        generated = await asyncio.to_thread(generate_ideas, risk)
         ranked = rank_and_filter(generated)
     except Exception as exc:  # pragma: no cover
         logger.error("Failed to build ideas for %s: %s", update.effective_user.id, exc)
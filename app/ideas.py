@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import atexit
+import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Literal, Optional
@@ -17,11 +20,21 @@ from .providers import (
 )
 from .providers_coingecko import get_coin_market
 from .providers_edgar import get_sources as get_edgar_sources
+from .providers_edgar import prefetch_submissions
 from .providers_fred import get_latest_value
 from .sources import IdeaSource, filter_fresh_sources
 from .strategy import portfolio_assets
 
 _KEY_RATE_WARNING_EMITTED = False
+# EDGAR and FRED are independent slow upstreams; overlap their round-trips.
+_SOURCE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="idea-sources")
+# fundamentals, tech, news, liquidity
+_SCORE_WEIGHTS = (0.35, 0.25, 0.25, 0.15)
+
+
+@atexit.register
+def _shutdown_source_pool() -> None:
+    _SOURCE_POOL.shutdown(wait=False, cancel_futures=True)
 
 
 @dataclass(slots=True)
@@ -68,7 +81,9 @@ def _safe_key_rate() -> Optional[float]:
 def generate_ideas(risk: str) -> list[Idea]:
     assets = portfolio_assets(risk)
     seen: set[tuple[str, str]] = set()
+    candidates: list[tuple[str, str, str]] = []
     ideas: list[Idea] = []
+    now = datetime.now(timezone.utc)
 
     for asset in assets:
         if not asset.ticker:
@@ -77,9 +92,7 @@ def generate_ideas(risk: str) -> list[Idea]:
         if key in seen:
             continue
         seen.add(key)
-        idea = _build_security_idea(asset.ticker, asset.board or "TQBR", asset.tag or asset.type)
-        if idea:
-            ideas.append(idea)
+        candidates.append((asset.ticker, asset.board or "TQBR", asset.tag or asset.type))
 
     # add optional ETF/FX picks regardless of risk profile
     for ticker, board, tag in _extra_candidates():
@@ -87,7 +100,12 @@ def generate_ideas(risk: str) -> list[Idea]:
         if key in seen:
             continue
         seen.add(key)
-        idea = _build_security_idea(ticker, board, tag)
+        candidates.append((ticker, board, tag))
+
+    # One concurrent SEC round instead of a request per security below.
+    prefetch_submissions(ticker for ticker, _, _ in candidates)
+    for ticker, board, tag in candidates:
+        idea = _build_security_idea(ticker, board, tag, now=now)
         if idea:
             ideas.append(idea)
 
@@ -104,11 +122,7 @@ def rank_and_filter(ideas: list[Idea]) -> list[Idea]:
     for idea in ideas:
         fresh_sources = filter_fresh_sources(idea.sources, settings.IDEAS_MAX_AGE_DAYS)
         idea.sources = fresh_sources
-        fund = _score_fundamentals(idea)
-        tech = _score_tech(idea)
-        news = _score_news(idea)
-        liquidity = _score_liquidity(idea)
-        score = 0.35 * fund + 0.25 * tech + 0.25 * news + 0.15 * liquidity
+        score = sum(weight * part for weight, part in zip(_SCORE_WEIGHTS, _score_all(idea)))
         idea.score = round(score, 4)
         idea.metrics["score"] = idea.score
         source_count = len(fresh_sources)
@@ -134,7 +148,10 @@ def rank_and_filter(ideas: list[Idea]) -> list[Idea]:
     return filtered[:topn]
 
 
-def _build_security_idea(ticker: str, board: str, tag: str) -> Optional[Idea]:
+def _build_security_idea(
+    ticker: str, board: str, tag: str, now: datetime | None = None
+) -> Optional[Idea]:
+    now = now or datetime.now(timezone.utc)
     try:
         quote = get_quote(ticker)
     except MarketDataError as exc:
@@ -153,6 +170,20 @@ def _build_security_idea(ticker: str, board: str, tag: str) -> Optional[Idea]:
         )
         return None
 
+    as_of = quote.as_of
+    if as_of is not None:
+        if as_of.tzinfo is None:
+            as_of = as_of.replace(tzinfo=timezone.utc)
+        age_days = (now - as_of).days
+        if age_days > settings.IDEAS_MAX_AGE_DAYS:
+            logger.info(
+                "Skipping idea for %s %s: stale quote (%s days old)",
+                ticker,
+                board,
+                age_days,
+            )
+            return None
+
     board_for_history = quote.board or board
 
     try:
@@ -185,7 +216,7 @@ def _build_security_idea(ticker: str, board: str, tag: str) -> Optional[Idea]:
     stop = round(quote.price * 0.9, 2)
 
     sources, macro_value = _collect_sources_for_security(
-        ticker, board_for_history, quote, snapshot, tag
+        ticker, board_for_history, quote, snapshot, tag, now=now
     )
     if macro_value is not None:
         metrics["macro_indicator"] = macro_value
@@ -289,25 +320,25 @@ def _normalize_history(rows: list[dict[str, object]]) -> list[HistoryPoint]:
 def _compute_metrics(history: list[HistoryPoint], quote, snapshot: dict) -> dict[str, float | str | None]:
     closes = [point.close for point in history if point.close is not None]
     metrics: dict[str, float | str | None] = {
-        "price": quote.price,
+        "price": _finite(quote.price),
         "currency": quote.currency,
     }
     if closes:
-        metrics["dma20"] = _moving_average(closes, 20)
-        metrics["dma50"] = _moving_average(closes, 50)
-        metrics["dma200"] = _moving_average(closes, 200)
-        metrics["rsi14"] = _compute_rsi(closes, 14)
+        metrics["dma20"] = _finite(_moving_average(closes, 20))
+        metrics["dma50"] = _finite(_moving_average(closes, 50))
+        metrics["dma200"] = _finite(_moving_average(closes, 200))
+        metrics["rsi14"] = _finite(_compute_rsi(closes, 14))
         window = closes[-260:] if len(closes) >= 260 else closes
-        metrics["high52"] = max(window)
-        metrics["low52"] = min(window)
+        metrics["high52"] = _finite(max(window))
+        metrics["low52"] = _finite(min(window))
     volumes = [point.volume for point in history if point.volume is not None]
     if volumes:
         tail = volumes[-20:] if len(volumes) >= 20 else volumes
-        metrics["avg_volume"] = sum(tail) / len(tail)
+        metrics["avg_volume"] = _finite(sum(tail) / len(tail))
     values = [point.value for point in history if point.value is not None]
     if values:
         tail = values[-20:] if len(values) >= 20 else values
-        metrics["avg_value"] = sum(tail) / len(tail)
+        metrics["avg_value"] = _finite(sum(tail) / len(tail))
 
     fundamentals = {
         "PE": "pe",
@@ -315,20 +346,13 @@ def _compute_metrics(history: list[HistoryPoint], quote, snapshot: dict) -> dict
         "ISSUECAPITALIZATION": "market_cap",
     }
     for field, key in fundamentals.items():
-        raw = snapshot.get(field)
-        if raw not in (None, ""):
-            try:
-                metrics[key] = float(str(raw).replace(",", "."))
-            except ValueError:
-                metrics[key] = None
-        else:
-            metrics[key] = None
+        metrics[key] = _finite(_coerce_float(snapshot.get(field)))
     metrics["lot"] = quote.lot
     if quote.price is not None and quote.lot:
-        metrics["lot_value"] = quote.price * quote.lot
+        metrics["lot_value"] = _finite(quote.price * quote.lot)
     else:
         metrics["lot_value"] = None
-    metrics["change_percent"] = quote.change
+    metrics["change_percent"] = _finite(quote.change)
     return metrics
 
 
@@ -342,16 +366,17 @@ def _moving_average(values: list[float], window: int) -> Optional[float]:
 def _compute_rsi(values: list[float], window: int) -> Optional[float]:
     if len(values) <= window:
         return None
-    gains: list[float] = []
-    losses: list[float] = []
-    for idx in range(1, len(values)):
-        change = values[idx] - values[idx - 1]
-        gains.append(max(change, 0))
-        losses.append(abs(min(change, 0)))
-    if len(gains) < window or len(losses) < window:
-        return None
-    avg_gain = sum(gains[-window:]) / window
-    avg_loss = sum(losses[-window:]) / window
+    # Only the last ``window`` price changes enter the averages.
+    tail = values[-window - 1 :]
+    gains = losses = 0.0
+    for previous, current in zip(tail, tail[1:]):
+        change = current - previous
+        if change > 0:
+            gains += change
+        else:
+            losses -= change
+    avg_gain = gains / window
+    avg_loss = losses / window
     if avg_loss == 0:
         return 100.0
     rs = avg_gain / avg_loss
@@ -397,7 +422,20 @@ def _collect_sources_for_security(
     quote,
     snapshot: dict,
     tag: str,
+    now: datetime | None = None,
 ) -> tuple[list[IdeaSource], Optional[float]]:
+    macro_value: Optional[float] = None
+    fred_series: Optional[tuple[str, str]] = None
+    if tag in {"bonds", "bonds_index"}:
+        fred_series = ("RUSCPIALLMINMEI", "OECD Russia CPI")
+    elif tag in {"growth", "core_equity"}:
+        fred_series = ("DGS10", "US 10Y Treasury")
+    elif tag in {"dividends"}:
+        fred_series = ("FEDFUNDS", "US Fed Funds Rate")
+
+    edgar_future = _SOURCE_POOL.submit(get_edgar_sources, ticker)
+    fred_future = _SOURCE_POOL.submit(get_latest_value, *fred_series) if fred_series else None
+
     sources: list[IdeaSource] = []
     sources.append(
         IdeaSource(
@@ -427,23 +465,13 @@ def _collect_sources_for_security(
             IdeaSource(
                 url=commentary["url"],
                 name=f"{commentary.get('source', 'MOEX')} аналитика",
-                date=datetime.now(timezone.utc),
+                date=now or datetime.now(timezone.utc),
             )
         )
-    sec_sources = get_edgar_sources(ticker)
-    sources.extend(sec_sources)
-
-    macro_value: Optional[float] = None
-    fred_series: Optional[tuple[str, str]] = None
-    if tag in {"bonds", "bonds_index"}:
-        fred_series = ("RUSCPIALLMINMEI", "OECD Russia CPI")
-    elif tag in {"growth", "core_equity"}:
-        fred_series = ("DGS10", "US 10Y Treasury")
-    elif tag in {"dividends"}:
-        fred_series = ("FEDFUNDS", "US Fed Funds Rate")
+    sources.extend(edgar_future.result())
 
-    if fred_series:
-        macro_value, fred_sources = get_latest_value(*fred_series)
+    if fred_future is not None:
+        macro_value, fred_sources = fred_future.result()
         sources.extend(fred_sources)
 
     return sources, macro_value
@@ -452,31 +480,24 @@ def _collect_sources_for_security(
 def _detect_risks(metrics: dict[str, float | str | None], tag: str) -> list[str]:
     risks: list[str] = []
     rsi = metrics.get("rsi14")
-    if isinstance(rsi, float):
+    if rsi is not None:
         if rsi > 70:
             risks.append("перекупленность по RSI")
         elif rsi < 30:
             risks.append("перепроданность по RSI")
     change = metrics.get("change_percent")
-    if isinstance(change, float) and abs(change) > 3:
+    if change is not None and abs(change) > 3:
         risks.append("дневная волатильность выше 3%")
     if tag in {"alternatives", "crypto"}:
         risks.append("повышенный риск категории актива")
     return risks
 
 
-def _score_fundamentals(idea: Idea) -> float:
+def _score_all(idea: Idea) -> tuple[float, float, float, float]:
+    """Return (fundamentals, tech, news, liquidity) reading metrics once."""
     metrics = idea.metrics
-    pe = metrics.get("pe")
-    div_yield = metrics.get("dividend_yield")
-    score = 0.4
-    if isinstance(pe, float) and pe > 0:
-        if 5 <= pe <= 15:
-            score += 0.3
-        elif pe < 5 or pe > 25:
-            score -= 0.1
-    key_rate_percent: Optional[float]
     stored_rate = metrics.get("key_rate")
+    key_rate_percent: Optional[float]
     if isinstance(stored_rate, (int, float)):
         key_rate_percent = float(stored_rate)
     else:
@@ -484,7 +505,30 @@ def _score_fundamentals(idea: Idea) -> float:
         key_rate_percent = rate_value * 100 if rate_value is not None else None
         if key_rate_percent is not None:
             metrics["key_rate"] = key_rate_percent
-    if isinstance(div_yield, float) and div_yield:
+
+    price = metrics.get("price")
+    return (
+        _score_fundamentals(metrics.get("pe"), metrics.get("dividend_yield"), key_rate_percent),
+        _score_tech(
+            price,
+            metrics.get("dma20"),
+            metrics.get("dma50"),
+            metrics.get("dma200"),
+            metrics.get("rsi14"),
+        ),
+        _score_news(idea.sources),
+        _score_liquidity(metrics.get("avg_value"), metrics.get("avg_volume")),
+    )
+
+
+def _score_fundamentals(pe, div_yield, key_rate_percent: Optional[float]) -> float:
+    score = 0.4
+    if pe is not None and pe > 0:
+        if 5 <= pe <= 15:
+            score += 0.3
+        elif pe < 5 or pe > 25:
+            score -= 0.1
+    if div_yield:
         if key_rate_percent is not None and div_yield >= key_rate_percent:
             score += 0.2
         elif div_yield >= 5:
@@ -492,23 +536,16 @@ def _score_fundamentals(idea: Idea) -> float:
     return max(min(score, 1.0), 0.0)
 
 
-def _score_tech(idea: Idea) -> float:
-    metrics = idea.metrics
-    price = metrics.get("price")
-    dma20 = metrics.get("dma20")
-    dma50 = metrics.get("dma50")
-    dma200 = metrics.get("dma200")
-    rsi = metrics.get("rsi14")
+def _score_tech(price, dma20, dma50, dma200, rsi) -> float:
     score = 0.5
-    if all(isinstance(val, float) for val in (price, dma20, dma50) if val is not None):
-        if price and dma20 and price >= dma20 and dma20 >= (dma50 or dma20):
-            score += 0.2
-        elif price and dma20 and price < dma20:
-            score -= 0.1
-    if isinstance(dma200, float) and isinstance(price, float):
+    if price and dma20 and price >= dma20 and dma20 >= (dma50 or dma20):
+        score += 0.2
+    elif price and dma20 and price < dma20:
+        score -= 0.1
+    if dma200 is not None and price is not None:
         if price >= dma200:
             score += 0.1
-    if isinstance(rsi, float):
+    if rsi is not None:
         if 40 <= rsi <= 60:
             score += 0.1
         elif rsi > 70 or rsi < 30:
@@ -516,19 +553,16 @@ def _score_tech(idea: Idea) -> float:
     return max(min(score, 1.0), 0.0)
 
 
-def _score_news(idea: Idea) -> float:
-    sources = idea.sources
-    count = sum(1 for src in sources if "аналит" in src.name.lower() or "sec" in src.name.lower())
+def _score_news(sources: list[IdeaSource]) -> float:
     total = len(sources)
     if total == 0:
         return 0.0
+    count = sum(src.is_news for src in sources)
     return max(min((count / total) + 0.3, 1.0), 0.0)
 
 
-def _score_liquidity(idea: Idea) -> float:
-    metrics = idea.metrics
-    avg_value = metrics.get("avg_value")
-    if isinstance(avg_value, float) and avg_value:
+def _score_liquidity(avg_value, avg_volume) -> float:
+    if avg_value:
         if avg_value >= 1e8:
             return 1.0
         if avg_value >= 5e7:
@@ -536,8 +570,7 @@ def _score_liquidity(idea: Idea) -> float:
         if avg_value >= 1e7:
             return 0.6
         return 0.3
-    avg_volume = metrics.get("avg_volume")
-    if isinstance(avg_volume, float) and avg_volume:
+    if avg_volume:
         if avg_volume >= 1_000_000:
             return 0.8
         if avg_volume >= 200_000:
@@ -546,6 +579,16 @@ def _score_liquidity(idea: Idea) -> float:
     return 0.1
 
 
+def _finite(value: object) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
 def _coerce_float(value: object) -> Optional[float]:
     if value in (None, ""):
         return None
@@ -1,19 +1,22 @@
-from sqlalchemy import Column, Integer, String, Date, Float
+from sqlalchemy import BigInteger, Column, Integer, Date, Enum, Float
 from .db import Base
 
+RISK_PROFILES = ("conservative", "balanced", "aggressive")
+CONTRIB_SOURCES = ("salary", "advance", "manual", "adjustment")
+
 class User(Base):
     __tablename__ = "users"
-    user_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(BigInteger, primary_key=True, index=True)  # Telegram id > 2^31
     salary_day = Column(Integer, default=25)     # оклад
     advance_day = Column(Integer, default=10)    # аванс
     min_contrib = Column(Integer, default=40000)
     max_contrib = Column(Integer, default=50000)
-    risk = Column(String, default="balanced")
+    risk = Column(Enum(*RISK_PROFILES, name="risk_enum"), default="balanced")
 
 class Contribution(Base):
     __tablename__ = "contribs"
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(BigInteger, index=True)
     date = Column(Date)
     amount = Column(Float)
-    source = Column(String, default="manual")  # "salary" | "advance" | "manual" | "adjustment"
+    source = Column(Enum(*CONTRIB_SOURCES, name="contrib_source_enum"), default="manual")
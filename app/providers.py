@@ -1,14 +1,29 @@
 from __future__ import annotations
 
-import re
+import asyncio
+import atexit
+import sys
+import threading
 import time
-from dataclasses import dataclass
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Literal, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional
+from weakref import WeakValueDictionary
+
+import numpy as np
 
 from . import _requests as requests
+from ._background import refresh_in_background
+from ._disk_cache import open_disk_cache
+from ._json import response_json
 from ._loguru import logger
 from ._tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from ._ttl_cache import TTLCache
 from .config import settings
 
 
@@ -20,7 +35,7 @@ class AggregatorAuthError(MarketDataError):
     """Raised when an aggregator rejects a request due to missing credentials."""
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class SourceRoute:
     name: Literal["MOEX", "BINANCE", "AGGREGATOR", "UNKNOWN"]
     symbol: str
@@ -32,7 +47,7 @@ class SourceRoute:
     is_traded: Optional[bool] = None
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class Quote:
     ticker: str
     price: Optional[float]
@@ -53,42 +68,209 @@ class Quote:
         if not self.ts_utc:
             return None
         try:
-            return datetime.fromisoformat(self.ts_utc.replace("Z", "+00:00"))
+            return datetime.fromisoformat(self.ts_utc)
         except ValueError:
             return None
 
 _MOEX_BASE = "https://iss.moex.com/iss"
+# ISS URL templates, parsed once; call with keyword arguments.
+_SECURITY_URL = f"{_MOEX_BASE}/securities/{{ticker}}.json".format
+_MARKETDATA_URL = (
+    f"{_MOEX_BASE}/engines/{{engine}}/markets/{{market}}/boards/{{board}}/securities/{{ticker}}.json"
+).format
+_BOARD_SECURITIES_URL = (
+    f"{_MOEX_BASE}/engines/{{engine}}/markets/{{market}}/boards/{{board}}/securities.json"
+).format
+_HISTORY_URL = (
+    f"{_MOEX_BASE}/history/engines/{{engine}}/markets/{{market}}/securities/{{ticker}}.json"
+).format
+_BOARD_HISTORY_URL = (
+    f"{_MOEX_BASE}/history/engines/{{engine}}/markets/{{market}}/boards/{{board}}/securities/{{ticker}}.json"
+).format
+_INDEX_URL = f"{_MOEX_BASE}/statistics/engines/stock/markets/index/securities/{{index}}.json".format
+_ANALYTICS_URL = f"{_MOEX_BASE}/statistics/engines/stock/markets/index/analytics.json"
+_RUONIA_URL = f"{_MOEX_BASE}/statistics/engines/stock/markets/bonds/ruonia.json"
 _BINANCE_BASE = "https://api.binance.com/api/v3"
 _TWELVEDATA_BASE = "https://api.twelvedata.com"
 _FINNHUB_BASE = "https://finnhub.io/api/v1"
 _CBR_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
 
-_CRYPTO_PAIR_RE = re.compile(r"^[A-Z]{3,10}(USDT|BTC|BUSD)$")
+# Binance pairs: 3-10 latin capitals followed by one of these quote assets.
+_CRYPTO_SUFFIXES = ("USDT", "BTC", "BUSD")
+# Ask ISS only for the columns the parsers below read.
+_MARKETDATA_COLUMNS = ",".join((
+    "SECID", "BOARDID", "LAST", "LCURRENTPRICE", "MARKETPRICE3", "MARKETPRICE", "LASTTOPREVPRICE",
+    "CLOSE", "LOTSIZE", "SYSTIME", "TIME", "UPDATETIME", "LASTCHANGEPRCNT", "VOLTODAY",
+    "VALTODAY", "FACEUNIT", "CURRENCYID", "SETTLECURRENCY",
+))
+_HISTORY_COLUMNS = ",".join((
+    "BOARDID", "TRADEDATE", "CLOSE", "LEGALCLOSEPRICE", "LEGALCLOSEPR", "LCLOSEPRICE",
+    "MARKETPRICE3", "MARKETPRICE", "LAST", "VOLUME", "VALUE",
+))
+# ISS caps history pages at 100 rows regardless of a larger ``limit``.
+_HISTORY_PAGE_SIZE = 100
+_BOARD_COLUMNS = "boardid,market,engine,is_traded"
+# Description fields read by the quote path and by ideas' fundamentals.
+_SECURITY_COLUMNS = ",".join((
+    "SECID", "LOTSIZE", "FACEUNIT", "CURRENCYID", "SETTLECURRENCY",
+    "PE", "DIVYIELD", "ISSUECAPITALIZATION", "UPDATEDATE", "LISTLEVELCHANGEDATE",
+))
+_INDEX_COLUMNS = "CURRENTVALUE,LASTVALUE,VALUE"
+_BOARD_SECURITY_COLUMNS = "SECID,BOARDID,LOTSIZE,FACEUNIT,CURRENCYID"
+_PRICE_FIELDS = ("LAST", "LCURRENTPRICE", "MARKETPRICE3", "MARKETPRICE", "LASTTOPREVPRICE", "CLOSE")
+_CURRENCY_FIELDS = ("FACEUNIT", "CURRENCYID", "SETTLECURRENCY")
+_ROUBLE_CODES = frozenset({"RUB", "SUR"})
+_TIMESTAMP_FIELDS = ("SYSTIME", "TIME", "UPDATETIME", "DATETIME")
+_TIMESTAMP_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+_UTC_OFFSET = "+00:00"
+_NUMERIC_TYPES = (int, float)
+_DAILY_CLOSE_FIELDS = ("CLOSE", "LEGALCLOSEPR", "LCLOSEPRICE")
+_HISTORY_PRICE_FIELDS = ("CLOSE", "LEGALCLOSEPR", "LCLOSEPRICE", "LAST")
+_HISTORY_CLOSE_FIELDS = ("CLOSE", "LEGALCLOSEPRICE", "MARKETPRICE3", "MARKETPRICE")
+_INDEX_VALUE_FIELDS = ("CURRENTVALUE", "LASTVALUE", "VALUE")
+_RUONIA_FIELDS = ("RUONIA", "RUONIAINDEX", "VALUE")
+_BOARD_FIELDS = ("BOARDID", "BOARD")
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "y"})
+
+_BOARD_MARKETS: Mapping[str, tuple[tuple[str, str], ...]] = MappingProxyType({
+    "TQBR": (("stock", "shares"),),
+    "TQTD": (("stock", "shares"),),
+    "SMAL": (("stock", "shares"),),
+    "FQBR": (("stock", "shares"),),
+    "TQTF": (("stock", "etf"), ("stock", "shares")),
+    "TQOB": (("stock", "bonds"),),
+    "TQCB": (("stock", "bonds"),),
+    "TQOD": (("stock", "bonds"),),
+    "SNDX": (("stock", "index"),),
+    "TOM": (("currency", "selt"), ("currency", "spot")),
+})
+_DEFAULT_MARKETS: tuple[tuple[str, str], ...] = (
+    ("stock", "shares"),
+    ("stock", "etf"),
+    ("stock", "bonds"),
+    ("stock", "index"),
+    ("currency", "selt"),
+)
 _ALWAYS_AGGREGATOR: dict[str, dict[str, str]] = {
     "YNDX": {"symbol": "YNDX.US", "currency": "USD", "reason": "moex_delisting_announced"},
 }
 
-_CACHE_TTL = timedelta(seconds=settings.CACHE_TTL_SEC)
-_QUOTE_CACHE: dict[str, tuple[datetime, Quote]] = {}
-_SECURITY_CACHE: dict[str, tuple[datetime, dict[str, list[dict[str, Any]]]]] = {}
-_BOARD_CACHE: dict[str, tuple[datetime, list[dict[str, Any]]]] = {}
-_HISTORY_CACHE: dict[tuple[str, str, int], tuple[datetime, list[dict[str, Any]]]] = {}
-_KEY_RATE_CACHE: tuple[datetime, float] | None = None
-_KEY_RATE_TTL = timedelta(hours=1)
-_INDEX_CACHE: dict[str, tuple[datetime, float]] = {}
-_INDEX_CACHE_TTL = timedelta(minutes=10)
+# TTLs are seconds; caches are size-bounded LRUs with monotonic expiry.
+_CACHE_TTL = float(settings.CACHE_TTL_SEC)
+# Quotes, history, index values and the key rate are served stale for up to _STALE_GRACE
+# seconds past their TTL while a background refresh runs. That refresh skips the disk
+# cache, whose copy is no newer than the stale one in memory.
+_STALE_GRACE = 1800.0
+# Prices that come from a closed session do not move until the next one.
+_OFF_SESSION_QUOTE_TTL = 600.0
+_OFF_SESSION_REASONS = frozenset({"eod_close_fallback", "stale_price"})
+_QUOTE_CACHE: TTLCache[Quote] = TTLCache(maxsize=1024, ttl=_CACHE_TTL, grace=_STALE_GRACE)
+_SECURITY_CACHE: TTLCache[dict[str, list[dict[str, Any]]]] = TTLCache(maxsize=1024, ttl=_CACHE_TTL)
+_BOARD_CACHE: TTLCache[list[dict[str, Any]]] = TTLCache(maxsize=1024, ttl=_CACHE_TTL)
+# Unknown SECIDs are remembered in the two caches above for a short while so that
+# repeated lookups skip the 404 round-trip without hiding new listings for long.
+_NOT_FOUND: Any = object()
+_NOT_FOUND_TTL = 300.0
+# Board listings change rarely; routes outlive the quote TTL. MOEX outages are not cached.
+_ROUTE_TTL = 900.0
+_ROUTE_CACHE: TTLCache[SourceRoute] = TTLCache(maxsize=1024, ttl=_ROUTE_TTL)
+# Batched (securities row, marketdata row) pairs keyed by (engine, market, board), then SECID.
+_BOARD_ROWS_CACHE: TTLCache[dict[str, tuple[Mapping[str, Any], Mapping[str, Any]]]] = TTLCache(
+    maxsize=64, ttl=_CACHE_TTL
+)
+_HISTORY_CACHE_TTL = 600.0
+# History lists are the largest entries; keep only enough for one ideas run.
+_HISTORY_CACHE: TTLCache[list[dict[str, Any]]] = TTLCache(
+    maxsize=128, ttl=_HISTORY_CACHE_TTL, grace=_STALE_GRACE
+)
+_KEY_RATE_TTL = 3600.0
+_KEY_RATE_CACHE: TTLCache[float] = TTLCache(maxsize=1, ttl=_KEY_RATE_TTL, grace=_STALE_GRACE)
+# With every remote source down, the last real rate or KEY_RATE_FALLBACK is kept
+# in memory only and only briefly, so the sources are asked again soon.
+_KEY_RATE_RETRY_TTL = 300.0
+# Remember a failed RUONIA lookup briefly and go straight to CBR meanwhile.
+_RUONIA_DOWN: TTLCache[bool] = TTLCache(maxsize=1, ttl=60.0)
+_INDEX_CACHE_TTL = 600.0
+# Commentary is wrapped in a 1-tuple so "no commentary" is cached too.
+_COMMENTARY_CACHE: TTLCache[tuple[Optional[dict[str, str]]]] = TTLCache(maxsize=1, ttl=900.0)
+_INDEX_CACHE: TTLCache[float] = TTLCache(maxsize=64, ttl=_INDEX_CACHE_TTL, grace=_STALE_GRACE)
+# (ETag, Last-Modified, tables) per ISS URL so refreshes can be answered with 304.
+_VALIDATOR_CACHE: TTLCache[tuple[Optional[str], Optional[str], dict[str, list[dict[str, Any]]]]] = (
+    TTLCache(maxsize=128, ttl=24 * 3600)
+)
+_DISK_CACHE = open_disk_cache(settings.CACHE_DB_PATH)
+_SNAPSHOT_DISK_TTL = 6 * 3600
+_HISTORY_DISK_TTL = 3600
+_PROBE_POOL = ThreadPoolExecutor(max_workers=6, thread_name_prefix="moex-probe")
+_AGGREGATOR_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="aggregator")
+# Locks disappear from the registry once no caller holds a reference.
+_INFLIGHT: WeakValueDictionary[tuple[Any, ...], threading.Lock] = WeakValueDictionary()
+_INFLIGHT_GUARD = threading.Lock()
+_TABLE_FETCHES: dict[tuple[Any, ...], Future] = {}
+_TABLE_FETCHES_GUARD = threading.Lock()
+_DASHBOARD_CONCURRENCY = 8
 
 
 class _NotFoundError(Exception):
     """Raised when ISS returns 404 for a security."""
 
 
+@contextmanager
+def _single_flight(key: tuple[Any, ...]) -> Iterator[None]:
+    """Serialize loaders for the same cache key so a cold miss hits the backend once."""
+
+    with _INFLIGHT_GUARD:
+        lock = _INFLIGHT.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _INFLIGHT[key] = lock
+    with lock:
+        yield
+
+
+def _refresh_in_background(key: tuple[Any, ...], loader: Callable[..., Any], *args: Any) -> None:
+    """Queue ``loader`` once per key; it runs under the same single-flight lock."""
+
+    refresh_in_background(key, _run_single_flight, key, loader, *args)
+
+
+def _run_single_flight(key: tuple[Any, ...], loader: Callable[..., Any], *args: Any) -> Any:
+    with _single_flight(key):
+        return loader(*args)
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    for pool in (_PROBE_POOL, _AGGREGATOR_POOL):
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1024)
+def _norm(value: str) -> str:
+    """Upper-case, strip and intern a ticker/board code; memoized since the same few codes repeat."""
+
+    return sys.intern(value.upper().strip())
+
+
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
 def _now_iso() -> str:
-    return _now().isoformat().replace("+00:00", "Z")
+    return _iso_z(_now())
+
+
+def _iso_z(value: datetime) -> str:
+    return value.isoformat().replace(_UTC_OFFSET, "Z")
+
+
+# Shared, never mutated: requests merges it into a fresh dict per request.
+_HTTP_HEADERS = {"Accept": "application/json", "User-Agent": settings.SEC_USER_AGENT}
+
+
+class _RetryableHTTPError(requests.HTTPError):
+    """Upstream 5xx; raised inside ``_http_get`` so the retry policy covers it."""
+
 
 @retry(
     stop=stop_after_attempt(3),
@@ -101,9 +283,7 @@ def _http_get(
     params: Optional[dict[str, Any]] = None,
     headers: Optional[dict[str, str]] = None,
 ):
-    final_headers = {"Accept": "application/json", "User-Agent": settings.SEC_USER_AGENT}
-    if headers:
-        final_headers.update(headers)
+    final_headers = {**_HTTP_HEADERS, **headers} if headers else _HTTP_HEADERS
     start = time.perf_counter()
     response = requests.get(url, params=params, headers=final_headers, timeout=settings.HTTP_TIMEOUT_SEC)
     duration = (time.perf_counter() - start) * 1000
@@ -114,26 +294,34 @@ def _http_get(
         status=status,
         duration=duration,
     )
+    # 4xx is permanent and left to the caller; only server errors are retried.
+    if isinstance(status, int) and status >= 500:
+        raise _RetryableHTTPError(f"HTTP {status} for {url}")
     return response
 
 
 def resolve_source(ticker: str) -> SourceRoute:
     """Determine which provider should serve the given ticker."""
 
-    symbol = ticker.upper().strip()
+    symbol = _norm(ticker)
     if not symbol:
         return SourceRoute(name="UNKNOWN", symbol="", reason="unknown_ticker", currency="SUR")
 
-    preset = _ALWAYS_AGGREGATOR.get(symbol)
+    cached = _ROUTE_CACHE.get(symbol)
+    if cached is not None:
+        return cached
+    route = _resolve_source_uncached(symbol)
+    if route.reason != "moex_unavailable":
+        _ROUTE_CACHE.set(symbol, route)
+    return route
+
+
+def _resolve_source_uncached(symbol: str) -> SourceRoute:
+    preset = _preset_route(symbol)
     if preset:
-        return SourceRoute(
-            name="AGGREGATOR",
-            symbol=preset.get("symbol", f"{symbol}.MOEX"),
-            reason=preset.get("reason"),
-            currency=preset.get("currency"),
-        )
+        return preset
 
-    if _CRYPTO_PAIR_RE.match(symbol):
+    if _is_crypto_pair(symbol):
         return SourceRoute(
             name="BINANCE",
             symbol=symbol,
@@ -143,16 +331,10 @@ def resolve_source(ticker: str) -> SourceRoute:
     try:
         boards = _get_security_boards(symbol)
     except _NotFoundError:
-        fallback = _aggregator_route(symbol, "unknown_ticker")
-        if fallback:
-            return fallback
-        return SourceRoute(name="UNKNOWN", symbol=symbol, reason="unknown_ticker", currency="SUR")
+        return _aggregator_route(symbol, "unknown_ticker")
     except requests.RequestException as exc:
         logger.warning("Failed to resolve %s via MOEX: %s", symbol, exc)
-        fallback = _aggregator_route(symbol, "moex_unavailable")
-        if fallback:
-            return fallback
-        raise MarketDataError("не удалось определить источник котировки") from exc
+        return _aggregator_route(symbol, "moex_unavailable")
 
     board_info = _select_board(symbol, boards)
     if board_info:
@@ -171,43 +353,153 @@ def resolve_source(ticker: str) -> SourceRoute:
             is_traded=is_traded,
         )
 
-    fallback = _aggregator_route(symbol, "unknown_ticker")
-    if fallback:
-        return fallback
-    return SourceRoute(name="UNKNOWN", symbol=symbol, reason="unknown_ticker", currency="SUR")
+    return _aggregator_route(symbol, "unknown_ticker")
 
 
 def get_quote(ticker: str) -> Quote:
-    """Return the latest quote for the given ticker from the appropriate source."""
+    """Return the latest quote for the given ticker from the appropriate source.
 
-    normalized = ticker.upper().strip()
+    Not a wrapper over :func:`get_quotes`: a single ticker keeps serving stale
+    quotes while refreshing in the background and raises :class:`MarketDataError`
+    instead of dropping the ticker. Quotes cached by a batch are reused here.
+    """
+
+    normalized = _norm(ticker)
     route = resolve_source(normalized)
     cache_key = f"{route.name}:{route.symbol}"
+    cached, stale = _QUOTE_CACHE.lookup(cache_key)
+    if cached is not None:
+        if stale:
+            _refresh_in_background(
+                ("quote", cache_key), _refresh_quote, normalized, route, cache_key, False
+            )
+        return cached
+
+    with _single_flight(("quote", cache_key)):
+        return _refresh_quote(normalized, route, cache_key)
+
+
+def get_quotes(tickers: Iterable[str]) -> dict[str, Quote]:
+    """Return quotes for several tickers with one ISS request per MOEX board.
+
+    Tickers whose lookup fails are left out of the result; one bad ticker never
+    costs the others their quotes.
+    """
+
+    symbols = list(dict.fromkeys(_norm(ticker) for ticker in tickers if ticker))
+    # Cold routes each need a MOEX boards lookup; resolve them side by side.
+    unresolved = [symbol for symbol in symbols if _ROUTE_CACHE.get(symbol) is None]
+    routes = (
+        dict(zip(unresolved, _PROBE_POOL.map(_resolve_or_none, unresolved)))
+        if len(unresolved) > 1
+        else {}
+    )
+    boards: dict[tuple[str, str, str], list[str]] = {}
+    batched: dict[str, tuple[SourceRoute, str]] = {}
+    for symbol in symbols:
+        route = routes[symbol] if symbol in routes else _resolve_or_none(symbol)
+        if route is None or route.name != "MOEX" or not route.board or route.is_traded is False:
+            continue
+        cache_key = f"{route.name}:{route.symbol}"
+        if _QUOTE_CACHE.get(cache_key) is None:
+            boards.setdefault(_moex_target(symbol, route), []).append(symbol)
+            batched[symbol] = (route, cache_key)
+
+    for (engine, market, board), secids in boards.items():
+        cached = _BOARD_ROWS_CACHE.get((engine, market, board))
+        if cached is not None and all(secid in cached for secid in secids):
+            continue
+        try:
+            _load_board_rows(engine, market, board, secids)
+        except requests.RequestException as exc:
+            logger.warning("Board marketdata fetch failed for %s: %s", board, exc)
+
+    quotes: dict[str, Quote] = {}
+    for symbol in symbols:
+        try:
+            if symbol in batched:
+                # Build from the board rows just fetched rather than serving
+                # a stale cached quote and refreshing it a second time.
+                route, cache_key = batched[symbol]
+                with _single_flight(("quote", cache_key)):
+                    quotes[symbol] = _refresh_quote(symbol, route, cache_key)
+            else:
+                quotes[symbol] = get_quote(symbol)
+        except MarketDataError as exc:
+            logger.warning("Quote unavailable for %s: %s", symbol, exc)
+        except Exception as exc:
+            logger.warning("Quote lookup failed for %s: %s", symbol, exc)
+    return quotes
+
+
+def _resolve_or_none(symbol: str) -> Optional[SourceRoute]:
+    try:
+        return resolve_source(symbol)
+    except Exception as exc:
+        logger.warning("Route lookup failed for %s: %s", symbol, exc)
+        return None
+
+
+def prefetch_quotes(tickers: Iterable[str]) -> int:
+    """Warm the quote caches for ``tickers``; return how many quotes were loaded."""
+
+    try:
+        return len(get_quotes(tickers))
+    except Exception as exc:
+        logger.warning("Quote prefetch failed: %s", exc)
+        return 0
+
+
+def _refresh_quote(
+    normalized: str, route: SourceRoute, cache_key: str, from_disk: bool = True
+) -> Quote:
     cached = _QUOTE_CACHE.get(cache_key)
-    now = _now()
-    if cached and now - cached[0] < _CACHE_TTL:
-        return cached[1]
+    if cached is not None:
+        return cached
 
-    if route.name == "MOEX":
-        quote = _get_moex_quote(normalized, route)
-    elif route.name == "BINANCE":
-        quote = _get_binance_quote(normalized, route)
-    elif route.name == "AGGREGATOR":
-        quote = _get_aggregator_quote(normalized, route)
-    else:
-        quote = Quote(
-            ticker=normalized,
-            price=None,
-            currency=route.currency or "SUR",
-            ts_utc=None,
-            source="UNKNOWN",
-            reason=route.reason or "unknown_ticker",
-        )
+    disk_key = ("quote", cache_key)
+    if from_disk and _DISK_CACHE is not None:
+        stored, remaining = _DISK_CACHE.get_with_ttl(disk_key)
+        if stored is not None:
+            _QUOTE_CACHE.set(cache_key, stored, ttl=min(remaining, _quote_ttl(stored)))
+            return stored
 
+    quote = _load_quote(normalized, route)
     if quote.price is not None:
-        _QUOTE_CACHE[cache_key] = (now, quote)
+        ttl = _quote_ttl(quote)
+        _QUOTE_CACHE.set(cache_key, quote, ttl=ttl)
+        if _DISK_CACHE is not None:
+            _DISK_CACHE.set(disk_key, quote, ttl=ttl)
     return quote
 
+
+def _quote_ttl(quote: Quote) -> float:
+    """Keep closing/stale prices longer and refresh fast-moving quotes sooner."""
+
+    if quote.reason in _OFF_SESSION_REASONS:
+        return max(_CACHE_TTL, _OFF_SESSION_QUOTE_TTL)
+    if quote.change:
+        return max(1.0, _CACHE_TTL / (1.0 + abs(quote.change) / 5.0))
+    return _CACHE_TTL
+
+
+def _load_quote(normalized: str, route: SourceRoute) -> Quote:
+    if route.name == "MOEX":
+        return _get_moex_quote(normalized, route)
+    if route.name == "BINANCE":
+        return _get_binance_quote(normalized, route)
+    if route.name == "AGGREGATOR":
+        return _get_aggregator_quote(normalized, route)
+    return Quote(
+        ticker=normalized,
+        price=None,
+        currency=route.currency or "SUR",
+        ts_utc=None,
+        source="UNKNOWN",
+        reason=route.reason or "unknown_ticker",
+    )
+
+
 def get_daily_close_moex(
     secid: str, board: str, market: str, day: date, engine: str = "stock"
 ) -> Optional[float]:
@@ -215,13 +507,12 @@ def get_daily_close_moex(
 
     params = {
         "iss.meta": "off",
+        "iss.only": "history",
         "from": day.isoformat(),
         "till": day.isoformat(),
+        "history.columns": _HISTORY_COLUMNS,
     }
-    url = (
-        f"{_MOEX_BASE}/history/engines/{engine}/markets/{market}/boards/{board}/"
-        f"securities/{secid}.json"
-    )
+    url = _BOARD_HISTORY_URL(engine=engine, market=market, board=board, ticker=secid)
     try:
         response = _http_get(url, params=params)
     except requests.RequestException as exc:
@@ -232,13 +523,13 @@ def get_daily_close_moex(
         return None
 
     response.raise_for_status()
-    tables = _parse_iss_tables(response.json())
+    tables = _parse_iss_tables(response_json(response))
     rows = tables.get("history") or []
     if not rows:
         return None
 
     last = rows[-1]
-    for field in ("CLOSE", "LEGALCLOSEPR", "LCLOSEPRICE"):
+    for field in _DAILY_CLOSE_FIELDS:
         value = _safe_float(last.get(field))
         if value is not None:
             return value
@@ -248,11 +539,8 @@ def get_daily_close_moex(
 def _fetch_history_last_price(
     ticker: str, board: str, engine: str, market: str
 ) -> Optional[float]:
-    params = {"iss.meta": "off", "iss.only": "history"}
-    url = (
-        f"{_MOEX_BASE}/history/engines/{engine}/markets/{market}/boards/{board}/"
-        f"securities/{ticker}.json"
-    )
+    params = {"iss.meta": "off", "iss.only": "history", "history.columns": _HISTORY_COLUMNS}
+    url = _BOARD_HISTORY_URL(engine=engine, market=market, board=board, ticker=ticker)
     try:
         response = _http_get(url, params=params)
     except requests.RequestException as exc:
@@ -268,13 +556,13 @@ def _fetch_history_last_price(
         return None
 
     response.raise_for_status()
-    tables = _parse_iss_tables(response.json())
+    tables = _parse_iss_tables(response_json(response))
     rows = tables.get("history") or []
     if not rows:
         return None
 
     last = rows[-1]
-    for field in ("CLOSE", "LEGALCLOSEPR", "LCLOSEPRICE", "LAST"):
+    for field in _HISTORY_PRICE_FIELDS:
         value = _safe_float(last.get(field))
         if value is not None:
             return value
@@ -284,61 +572,82 @@ def _fetch_history_last_price(
 def get_key_rate() -> float:
     """Return the current key rate, preferring MOEX RUONIA with CBR fallback."""
 
-    global _KEY_RATE_CACHE
+    cached, stale = _KEY_RATE_CACHE.lookup("key_rate")
+    if cached is not None:
+        if stale:
+            _refresh_in_background(("key_rate",), _load_key_rate, False)
+        return cached
 
-    now = _now()
-    if _KEY_RATE_CACHE and now - _KEY_RATE_CACHE[0] < _KEY_RATE_TTL:
-        return _KEY_RATE_CACHE[1]
+    with _single_flight(("key_rate",)):
+        return _load_key_rate()
 
-    rate = _fetch_ruonia_key_rate()
+
+def _load_key_rate(from_disk: bool = True) -> float:
+    cached = _KEY_RATE_CACHE.get("key_rate")
+    if cached is not None:
+        return cached
+
+    if from_disk and _DISK_CACHE is not None:
+        stored, remaining = _DISK_CACHE.get_with_ttl(("key_rate",))
+        if stored is not None:
+            _KEY_RATE_CACHE.set("key_rate", stored, ttl=min(remaining, _KEY_RATE_TTL))
+            return stored
+
+    rate = None
+    if _RUONIA_DOWN.get("ruonia") is None:
+        rate = _fetch_ruonia_key_rate()
+        if rate is None:
+            _RUONIA_DOWN.set("ruonia", True)
     if rate is None:
         rate = _fetch_cbr_key_rate()
 
     if rate is None:
-        fallback = getattr(settings, "KEY_RATE_FALLBACK", None)
-        if fallback is not None:
+        rate = _KEY_RATE_CACHE.get_stale("key_rate")
+        if rate is None:
+            rate = getattr(settings, "KEY_RATE_FALLBACK", None)
+            if rate is None:
+                raise MarketDataError("не удалось получить ключевую ставку")
             logger.warning(
                 "Key rate unavailable from remote sources; using fallback %.2f%%",
-                fallback * 100,
+                rate * 100,
             )
-            rate = fallback
-        elif _KEY_RATE_CACHE:
-            return _KEY_RATE_CACHE[1]
-        else:
-            raise MarketDataError("не удалось получить ключевую ставку")
+        _KEY_RATE_CACHE.set("key_rate", rate, ttl=_KEY_RATE_RETRY_TTL)
+        return rate
 
-    _KEY_RATE_CACHE = (now, rate)
+    _KEY_RATE_CACHE.set("key_rate", rate)
+    if _DISK_CACHE is not None:
+        _DISK_CACHE.set(("key_rate",), rate, ttl=_KEY_RATE_TTL)
     return rate
 
 
 def get_market_commentary() -> Optional[dict[str, str]]:
-    url = f"{_MOEX_BASE}/statistics/engines/stock/markets/index/analytics.json"
+    cached = _COMMENTARY_CACHE.get("commentary")
+    if cached is not None:
+        return cached[0]
+
     try:
-        tables = _fetch_moex_tables(url, {"iss.meta": "off"})
+        tables = _fetch_moex_tables(_ANALYTICS_URL, {"iss.meta": "off"})
     except requests.RequestException:
         return None
 
+    commentary = _parse_commentary(tables)
+    _COMMENTARY_CACHE.set("commentary", (commentary,))
+    return commentary
+
+
+def _parse_commentary(tables: dict[str, list[dict[str, Any]]]) -> Optional[dict[str, str]]:
     analytics = tables.get("analytics") or []
     if not analytics:
         return None
 
     row = analytics[0]
-    normalized = {str(k).lower(): v for k, v in row.items()}
-    title = _clean_str(normalized.get("title") or normalized.get("name"))
+    title = _clean_str(_ci_first(row, ("title", "name")))
     if not title:
         return None
 
-    summary = _clean_str(
-        normalized.get("annotation")
-        or normalized.get("brief")
-        or normalized.get("text")
-    )
-    url_value = _clean_str(
-        normalized.get("url")
-        or normalized.get("href")
-        or normalized.get("link")
-    )
-    source = _clean_str(normalized.get("source")) or "MOEX"
+    summary = _clean_str(_ci_first(row, ("annotation", "brief", "text")))
+    url_value = _clean_str(_ci_first(row, ("url", "href", "link")))
+    source = _clean_str(_ci_first(row, ("source",))) or "MOEX"
 
     result = {"title": title, "source": source}
     if summary:
@@ -349,19 +658,38 @@ def get_market_commentary() -> Optional[dict[str, str]]:
 
 
 def get_index_value(name: str) -> float:
-    key = name.upper()
-    now = _now()
+    key = _norm(name)
+    cached, stale = _INDEX_CACHE.lookup(key)
+    if cached is not None:
+        if stale:
+            _refresh_in_background(("index", key), _load_index_value, key, False)
+        return cached
+
+    with _single_flight(("index", key)):
+        return _load_index_value(key)
+
+
+def _load_index_value(key: str, from_disk: bool = True) -> float:
     cached = _INDEX_CACHE.get(key)
-    if cached and now - cached[0] < _INDEX_CACHE_TTL:
-        return cached[1]
+    if cached is not None:
+        return cached
+
+    if from_disk and _DISK_CACHE is not None:
+        stored, remaining = _DISK_CACHE.get_with_ttl(("index", key))
+        if stored is not None:
+            _INDEX_CACHE.set(key, stored, ttl=min(remaining, _INDEX_CACHE_TTL))
+            return stored
 
-    url = f"{_MOEX_BASE}/statistics/engines/stock/markets/index/securities/{key}.json"
+    url = _INDEX_URL(index=key)
     try:
-        tables = _fetch_moex_tables(url, {"iss.meta": "off"})
+        tables = _fetch_moex_tables(
+            url, {"iss.meta": "off", "securities.columns": _INDEX_COLUMNS}
+        )
     except requests.RequestException as exc:
         logger.warning("Failed to load index value {key}: {exc}", key=key, exc=exc)
-        if cached:
-            return cached[1]
+        stale = _INDEX_CACHE.get_stale(key)
+        if stale is not None:
+            return stale
         raise
 
     securities = tables.get("securities") or tables.get("index") or []
@@ -370,7 +698,7 @@ def get_index_value(name: str) -> float:
 
     row = securities[0]
     value = None
-    for field in ("CURRENTVALUE", "LASTVALUE", "VALUE"):
+    for field in _INDEX_VALUE_FIELDS:
         value = _safe_float(row.get(field))
         if value is not None:
             break
@@ -378,66 +706,225 @@ def get_index_value(name: str) -> float:
     if value is None:
         raise MarketDataError(f"не удалось получить значение индекса {key}")
 
-    _INDEX_CACHE[key] = (now, value)
+    _INDEX_CACHE.set(key, value)
+    if _DISK_CACHE is not None:
+        _DISK_CACHE.set(("index", key), value, ttl=_INDEX_CACHE_TTL)
     return value
 
 
 def get_security_snapshot(ticker: str) -> dict[str, Any]:
-    tables = _get_security_tables(ticker.upper())
+    ticker = _norm(ticker)
+    key = ("snapshot", ticker)
+    with _single_flight(key):
+        return _load_security_snapshot(ticker, key)
+
+
+def _load_security_snapshot(ticker: str, key: tuple[str, str]) -> dict[str, Any]:
+    if _DISK_CACHE is not None:
+        cached = _DISK_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    tables = _get_security_tables(ticker)
     data = tables.get("securities") or []
-    return data[0] if data else {}
+    snapshot = data[0] if data else {}
+    if _DISK_CACHE is not None and snapshot:
+        _DISK_CACHE.set(key, snapshot, ttl=_SNAPSHOT_DISK_TTL)
+    return snapshot
 
 
 def get_security_history(ticker: str, board: str, days: int = 260) -> list[dict[str, Any]]:
-    board = board.upper()
-    key = (ticker.upper(), board, days)
-    now = _now()
+    ticker = _norm(ticker)
+    board = _norm(board)
+    key = (ticker, board, days)
+    cached, stale = _HISTORY_CACHE.lookup(key)
+    if cached is not None:
+        if stale:
+            _refresh_in_background(
+                ("history",) + key, _load_security_history, ticker, board, days, key, False
+            )
+        return cached
+
+    with _single_flight(("history",) + key):
+        return _load_security_history(ticker, board, days, key)
+
+
+def _load_security_history(
+    ticker: str, board: str, days: int, key: tuple[str, str, int], from_disk: bool = True
+) -> list[dict[str, Any]]:
     cached = _HISTORY_CACHE.get(key)
-    if cached and now - cached[0] < timedelta(minutes=10):
-        return cached[1]
+    if cached is not None:
+        return cached
+
+    disk_key = ("history",) + key
+    if from_disk and _DISK_CACHE is not None:
+        stored, remaining = _DISK_CACHE.get_with_ttl(disk_key)
+        if stored is not None:
+            _HISTORY_CACHE.set(key, stored, ttl=min(remaining, _HISTORY_CACHE_TTL))
+            return stored
 
     routes = _market_candidates(board)
     cutoff = (_now() - timedelta(days=days * 2)).date()
     collected: list[dict[str, Any]] = []
 
-    for engine, market in routes:
-        start = 0
-        while True:
-            params = {
-                "iss.meta": "off",
-                "from": cutoff.isoformat(),
-                "start": start,
-            }
-            url = (
-                f"{_MOEX_BASE}/history/engines/{engine}/markets/{market}/"
-                f"securities/{ticker}.json"
-            )
-            try:
-                tables = _fetch_moex_tables(url, params)
-            except requests.RequestException as exc:
-                logger.warning(
-                    "History fetch failed for {ticker} on {market}: {exc}",
-                    ticker=ticker,
-                    market=market,
-                    exc=exc,
-                )
+    if len(routes) == 1:
+        engine, market = routes[0]
+        first_pages = [(engine, market, _fetch_history_page(ticker, engine, market, cutoff, 0))]
+    else:
+        # Probe every candidate market at once, but keep the preference order
+        # of ``routes`` when picking the winner.
+        futures = [
+            (engine, market, _PROBE_POOL.submit(_fetch_history_page, ticker, engine, market, cutoff, 0))
+            for engine, market in routes
+        ]
+        first_pages = []
+        for index, (engine, market, future) in enumerate(futures):
+            rows = future.result()
+            first_pages.append((engine, market, rows))
+            if rows:
+                for _, _, pending in futures[index + 1 :]:
+                    pending.cancel()
                 break
 
-            rows = tables.get("history") or []
+    for engine, market, rows in first_pages:
+        if not rows:
+            continue
+        collected.extend(rows)
+        while len(rows) >= _HISTORY_PAGE_SIZE and len(collected) < days:
+            rows = _fetch_history_page(ticker, engine, market, cutoff, len(collected))
             if not rows:
                 break
-
             collected.extend(rows)
-            if len(rows) < 100 or len(collected) >= days:
-                break
-            start += len(rows)
+        break
 
-        if collected:
-            break
-
-    _HISTORY_CACHE[key] = (now, collected)
+    _HISTORY_CACHE.set(key, collected)
+    if _DISK_CACHE is not None and collected:
+        _DISK_CACHE.set(disk_key, collected, ttl=_HISTORY_DISK_TTL)
     return collected
 
+
+def get_security_history_arrays(
+    ticker: str, board: str, days: int = 260
+) -> dict[str, np.ndarray]:
+    """Columnar view of :func:`get_security_history` for vectorized analytics.
+
+    ``TRADEDATE`` is ``datetime64[D]``; ``CLOSE``, ``VOLUME`` and ``VALUE`` are
+    float64 with NaN where ISS had no number.
+    """
+
+    rows = get_security_history(ticker, board, days)
+    count = len(rows)
+    return {
+        "TRADEDATE": np.array(
+            [str(row.get("TRADEDATE") or "NaT")[:10] for row in rows], dtype="datetime64[D]"
+        ),
+        "CLOSE": np.fromiter(
+            (_first_float(row, _HISTORY_CLOSE_FIELDS) for row in rows), dtype=float, count=count
+        ),
+        "VOLUME": np.fromiter(
+            (_first_float(row, ("VOLUME",)) for row in rows), dtype=float, count=count
+        ),
+        "VALUE": np.fromiter(
+            (_first_float(row, ("VALUE",)) for row in rows), dtype=float, count=count
+        ),
+    }
+
+
+def _first_float(row: Mapping[str, Any], fields: tuple[str, ...]) -> float:
+    for field in fields:
+        value = _safe_float(row.get(field))
+        if value is not None:
+            return value
+    return float("nan")
+
+
+def _fetch_history_page(
+    ticker: str, engine: str, market: str, cutoff: date, start: int
+) -> list[dict[str, Any]]:
+    params = {
+        "iss.meta": "off",
+        "iss.only": "history",
+        "from": cutoff.isoformat(),
+        "start": start,
+        "limit": _HISTORY_PAGE_SIZE,
+        "history.columns": _HISTORY_COLUMNS,
+    }
+    url = _HISTORY_URL(engine=engine, market=market, ticker=ticker)
+    try:
+        tables = _fetch_moex_tables(url, params)
+    except requests.RequestException as exc:
+        logger.warning(
+            "History fetch failed for {ticker} on {market}: {exc}",
+            ticker=ticker,
+            market=market,
+            exc=exc,
+        )
+        return []
+    return tables.get("history") or []
+
+
+async def aget_quote(ticker: str) -> Quote:
+    """Async variant of :func:`get_quote` for use inside bot handlers."""
+    return await asyncio.to_thread(get_quote, ticker)
+
+
+async def aget_security_history(
+    ticker: str, board: str, days: int = 260
+) -> list[dict[str, Any]]:
+    """Async variant of :func:`get_security_history` for use inside bot handlers."""
+    return await asyncio.to_thread(get_security_history, ticker, board, days)
+
+
+@dataclass(slots=True)
+class DashboardSnapshot:
+    key_rate: Optional[float]
+    index_value: Optional[float]
+    commentary: Optional[dict[str, str]]
+    quotes: dict[str, Quote]
+
+
+async def fetch_dashboard(
+    tickers: Iterable[str], index_name: str = "IMOEX"
+) -> DashboardSnapshot:
+    """Fetch key rate, index, commentary and quotes concurrently.
+
+    Failed parts come back as ``None`` (or are missing from ``quotes``) instead
+    of failing the whole snapshot.
+    """
+
+    semaphore = asyncio.Semaphore(_DASHBOARD_CONCURRENCY)
+
+    async def bounded(func: Callable[..., Any], *args: Any) -> Any:
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    symbols = list(dict.fromkeys(_norm(ticker) for ticker in tickers))
+    key_rate, index_value, commentary, *quotes = await asyncio.gather(
+        bounded(get_key_rate),
+        bounded(get_index_value, index_name),
+        bounded(get_market_commentary),
+        *(bounded(get_quote, symbol) for symbol in symbols),
+        return_exceptions=True,
+    )
+
+    def unwrap(label: str, result: Any) -> Any:
+        if isinstance(result, Exception):
+            logger.warning("Dashboard part {label} failed: {exc}", label=label, exc=result)
+            return None
+        return result
+
+    return DashboardSnapshot(
+        key_rate=unwrap("key_rate", key_rate),
+        index_value=unwrap(index_name, index_value),
+        commentary=unwrap("commentary", commentary),
+        quotes={
+            symbol: quote
+            for symbol, result in zip(symbols, quotes)
+            if (quote := unwrap(symbol, result)) is not None
+        },
+    )
+
+
 def _get_moex_quote(ticker: str, route: SourceRoute) -> Quote:
     if not route.board:
         return Quote(
@@ -451,14 +938,21 @@ def _get_moex_quote(ticker: str, route: SourceRoute) -> Quote:
             reason=route.reason or "no_active_trading_on_moex",
         )
 
-    tables = _get_security_tables(ticker)
-    securities = tables.get("securities") or []
-    sec_row = securities[0] if securities else {}
-
-    engine = (route.engine or "stock").lower()
-    market = (route.market or "shares").lower()
-    if ticker.upper().startswith("FX"):
-        market = "shares"
+    engine, market, board = _moex_target(ticker, route)
+    batched = None
+    if route.is_traded is not False:
+        board_rows = _BOARD_ROWS_CACHE.get((engine, market, board))
+        batched = board_rows.get(ticker) if board_rows else None
+
+    md_row: Optional[Mapping[str, Any]] = None
+    if batched is not None:
+        sec_row, md_row = batched
+    elif route.is_traded is not False:
+        sec_row, md_row = _moex_security_rows(ticker, engine, market, board)
+    else:
+        tables = _get_security_tables(ticker)
+        securities = tables.get("securities") or []
+        sec_row = securities[0] if securities else {}
 
     lot = None
     change = None
@@ -471,28 +965,7 @@ def _get_moex_quote(ticker: str, route: SourceRoute) -> Quote:
     context: Optional[str] = None
 
     if route.is_traded is not False:
-        params = {"iss.meta": "off", "iss.only": "marketdata"}
-        url = (
-            f"{_MOEX_BASE}/engines/{engine}/markets/{market}/"
-            f"boards/{route.board}/securities/{ticker}.json"
-        )
-        try:
-            response = _http_get(url, params=params)
-            response.raise_for_status()
-        except requests.RequestException as exc:
-            logger.warning(
-                "Marketdata fetch failed for {ticker} {board}: {exc}",
-                ticker=ticker,
-                board=route.board,
-                exc=exc,
-            )
-        else:
-            md_tables = _parse_iss_tables(response.json())
-            marketdata = md_tables.get("marketdata") or []
-            md_row = _find_row_by_board(marketdata, route.board) or (
-                marketdata[0] if marketdata else {}
-            )
-
+        if md_row is not None:
             price = _extract_price(md_row)
             lot = _extract_lot(sec_row, md_row)
             timestamp = _extract_timestamp(md_row)
@@ -550,7 +1023,7 @@ def _get_moex_quote(ticker: str, route: SourceRoute) -> Quote:
             context=context if context else route.reason,
         )
 
-    ts_iso = timestamp.isoformat().replace("+00:00", "Z") if timestamp else _now_iso()
+    ts_iso = _iso_z(timestamp) if timestamp else _now_iso()
     return Quote(
         ticker=ticker,
         price=price,
@@ -572,7 +1045,7 @@ def _get_binance_quote(ticker: str, route: SourceRoute) -> Quote:
     params = {"symbol": route.symbol}
     response = _http_get(f"{_BINANCE_BASE}/ticker/price", params=params)
     response.raise_for_status()
-    payload = response.json()
+    payload = response_json(response)
     price = _safe_float(payload.get("price"))
     if price is None:
         raise MarketDataError(f"цена не найдена для {route.symbol} на Binance")
@@ -588,9 +1061,16 @@ def _get_binance_quote(ticker: str, route: SourceRoute) -> Quote:
 
 
 def _get_aggregator_quote(ticker: str, route: SourceRoute) -> Quote:
+    # With both keys configured, start Finnhub alongside Twelve Data; its
+    # answer is only used when Twelve Data has none.
+    finnhub: Optional[Future] = None
+    if settings.TWELVEDATA_API_KEY and settings.FINNHUB_API_KEY:
+        finnhub = _AGGREGATOR_POOL.submit(_fetch_finnhub_quote, ticker, route)
     try:
         quote = _fetch_twelvedata_quote(ticker, route)
     except AggregatorAuthError:
+        if finnhub is not None:
+            finnhub.cancel()
         return Quote(
             ticker=ticker,
             price=None,
@@ -602,20 +1082,18 @@ def _get_aggregator_quote(ticker: str, route: SourceRoute) -> Quote:
         )
     except MarketDataError:
         quote = None
+    except BaseException:
+        if finnhub is not None:
+            finnhub.cancel()
+        raise
     if quote:
-        if route.reason and not quote.reason:
-            quote.reason = route.reason
-        elif route.reason and quote.reason != route.reason:
-            quote.context = route.reason
-        return quote
+        if finnhub is not None:
+            finnhub.cancel()
+        return _with_route_reason(quote, route)
 
-    quote = _fetch_finnhub_quote(ticker, route)
+    quote = finnhub.result() if finnhub is not None else _fetch_finnhub_quote(ticker, route)
     if quote:
-        if route.reason and not quote.reason:
-            quote.reason = route.reason
-        elif route.reason and quote.reason != route.reason:
-            quote.context = route.reason
-        return quote
+        return _with_route_reason(quote, route)
 
     if not settings.TWELVEDATA_API_KEY and not settings.FINNHUB_API_KEY:
         return Quote(
@@ -639,6 +1117,76 @@ def _get_aggregator_quote(ticker: str, route: SourceRoute) -> Quote:
     )
 
 
+def _moex_target(ticker: str, route: SourceRoute) -> tuple[str, str, str]:
+    engine = (route.engine or "stock").lower()
+    market = (route.market or "shares").lower()
+    if ticker.startswith("FX"):
+        market = "shares"
+    return engine, market, _norm(route.board or "")
+
+
+def _moex_security_rows(
+    ticker: str, engine: str, market: str, board: str
+) -> tuple[Mapping[str, Any], Optional[Mapping[str, Any]]]:
+    """Board-level security and marketdata rows for one ticker from a single ISS request."""
+
+    params = {
+        "iss.meta": "off",
+        "iss.only": "securities,marketdata",
+        "securities.columns": _BOARD_SECURITY_COLUMNS,
+        "marketdata.columns": _MARKETDATA_COLUMNS,
+    }
+    url = _MARKETDATA_URL(engine=engine, market=market, board=board, ticker=ticker)
+    try:
+        response = _http_get(url, params=params)
+        response.raise_for_status()
+    except requests.RequestException as exc:
+        logger.warning(
+            "Marketdata fetch failed for {ticker} {board}: {exc}",
+            ticker=ticker,
+            board=board,
+            exc=exc,
+        )
+        return {}, None
+
+    tables = _parse_iss_tables(response_json(response))
+    securities = tables.get("securities") or []
+    marketdata = tables.get("marketdata") or []
+    sec_row = _index_by_board(securities).get(board) or (securities[0] if securities else {})
+    md_row = _index_by_board(marketdata).get(board) or (marketdata[0] if marketdata else {})
+    return sec_row, md_row
+
+
+def _load_board_rows(
+    engine: str, market: str, board: str, secids: Iterable[str]
+) -> dict[str, tuple[Mapping[str, Any], Mapping[str, Any]]]:
+    url = _BOARD_SECURITIES_URL(engine=engine, market=market, board=board)
+    params = {
+        "iss.meta": "off",
+        "iss.only": "securities,marketdata",
+        "securities": ",".join(sorted(secids)),
+        "securities.columns": _BOARD_SECURITY_COLUMNS,
+        "marketdata.columns": _MARKETDATA_COLUMNS,
+    }
+    tables = _fetch_moex_tables(url, params)
+    sec_rows = {_norm(row.get("SECID") or ""): row for row in tables.get("securities") or []}
+    rows: dict[str, tuple[Mapping[str, Any], Mapping[str, Any]]] = {}
+    for row in tables.get("marketdata") or []:
+        secid = _norm(row.get("SECID") or "")
+        if secid:
+            rows[secid] = (sec_rows.get(secid, {}), row)
+    _BOARD_ROWS_CACHE.set((engine, market, board), rows)
+    return rows
+
+
+def _with_route_reason(quote: Quote, route: SourceRoute) -> Quote:
+    if route.reason and not quote.reason:
+        return replace(quote, reason=route.reason)
+    if route.reason and quote.reason != route.reason:
+        return replace(quote, context=route.reason)
+    return quote
+
+
 def _fetch_twelvedata_quote(ticker: str, route: SourceRoute) -> Optional[Quote]:
     api_key = settings.TWELVEDATA_API_KEY
     if not api_key:
@@ -656,7 +1204,7 @@ def _fetch_twelvedata_quote(ticker: str, route: SourceRoute) -> Optional[Quote]:
         raise AggregatorAuthError("missing_api_key")
 
     response.raise_for_status()
-    payload = response.json()
+    payload = response_json(response)
     if isinstance(payload, dict) and payload.get("status") == "error":
         message = str(payload.get("message") or "")
         code_raw = payload.get("code")
@@ -697,7 +1245,7 @@ def _fetch_finnhub_quote(ticker: str, route: SourceRoute) -> Optional[Quote]:
     params = {"symbol": route.symbol, "token": api_key}
     response = _http_get(f"{_FINNHUB_BASE}/quote", params=params)
     response.raise_for_status()
-    payload = response.json()
+    payload = response_json(response)
     price = _safe_float(payload.get("c"))
     if price is None:
         return None
@@ -714,7 +1262,7 @@ def _fetch_finnhub_quote(ticker: str, route: SourceRoute) -> Optional[Quote]:
     )
 
 def _fetch_ruonia_key_rate() -> Optional[float]:
-    url = f"{_MOEX_BASE}/statistics/engines/stock/markets/bonds/ruonia.json"
+    url = _RUONIA_URL
     try:
         tables = _fetch_moex_tables(url, {"iss.meta": "off", "limit": 1})
     except requests.RequestException as exc:
@@ -728,7 +1276,7 @@ def _fetch_ruonia_key_rate() -> Optional[float]:
 
     row = rows[0]
     value = None
-    for field in ("RUONIA", "RUONIAINDEX", "VALUE"):
+    for field in _RUONIA_FIELDS:
         value = _safe_float(row.get(field))
         if value is not None:
             break
@@ -744,7 +1292,7 @@ def _fetch_cbr_key_rate() -> Optional[float]:
     try:
         response = _http_get(_CBR_URL)
         response.raise_for_status()
-        payload = response.json()
+        payload = response_json(response)
     except requests.RequestException as exc:
         logger.warning("Failed to fetch key rate from CBR: {exc}", exc=exc)
         return None
@@ -759,48 +1307,102 @@ def _fetch_cbr_key_rate() -> Optional[float]:
 
 
 def _get_security_tables(ticker: str) -> dict[str, list[dict[str, Any]]]:
-    key = ticker.upper()
-    now = _now()
+    key = _norm(ticker)
     cached = _SECURITY_CACHE.get(key)
-    if cached and now - cached[0] < _CACHE_TTL:
-        return cached[1]
+    if cached is _NOT_FOUND:
+        raise _NotFoundError()
+    if cached is not None:
+        return cached
 
-    params = {"iss.meta": "off"}
-    url = f"{_MOEX_BASE}/securities/{key}.json"
+    params = {
+        "iss.meta": "off",
+        "iss.only": "securities",
+        "securities.columns": _SECURITY_COLUMNS,
+    }
+    url = _SECURITY_URL(ticker=key)
     response = _http_get(url, params=params)
     if getattr(response, "status_code", 200) == 404:
+        _SECURITY_CACHE.set(key, _NOT_FOUND, ttl=_NOT_FOUND_TTL)
         raise _NotFoundError()
     response.raise_for_status()
-    tables = _parse_iss_tables(response.json())
-    _SECURITY_CACHE[key] = (now, tables)
+    tables = _parse_iss_tables(response_json(response))
+    _SECURITY_CACHE.set(key, tables)
     return tables
 
 
 def _get_security_boards(ticker: str) -> list[dict[str, Any]]:
-    key = ticker.upper()
-    now = _now()
+    key = _norm(ticker)
     cached = _BOARD_CACHE.get(key)
-    if cached and now - cached[0] < _CACHE_TTL:
-        return cached[1]
+    if cached is _NOT_FOUND:
+        raise _NotFoundError()
+    if cached is not None:
+        return cached
 
-    params = {"iss.meta": "off", "iss.only": "boards"}
-    url = f"{_MOEX_BASE}/securities/{key}.json"
+    params = {"iss.meta": "off", "iss.only": "boards", "boards.columns": _BOARD_COLUMNS}
+    url = _SECURITY_URL(ticker=key)
     response = _http_get(url, params=params)
     if getattr(response, "status_code", 200) == 404:
+        _BOARD_CACHE.set(key, _NOT_FOUND, ttl=_NOT_FOUND_TTL)
         raise _NotFoundError()
     response.raise_for_status()
-    tables = _parse_iss_tables(response.json())
+    tables = _parse_iss_tables(response_json(response))
     boards = tables.get("boards") or []
-    _BOARD_CACHE[key] = (now, boards)
+    _BOARD_CACHE.set(key, boards)
     return boards
 
 
 def _fetch_moex_tables(
     url: str, params: Optional[dict[str, Any]] = None
 ) -> dict[str, list[dict[str, Any]]]:
-    response = _http_get(url, params=params)
+    """Fetch ISS tables; concurrent callers for the same request share one GET."""
+
+    key = (url, tuple(sorted((params or {}).items())))
+    with _TABLE_FETCHES_GUARD:
+        future = _TABLE_FETCHES.get(key)
+        leader = future is None
+        if leader:
+            future = _TABLE_FETCHES[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        tables = _request_moex_tables(url, params, key)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(tables)
+        return tables
+    finally:
+        with _TABLE_FETCHES_GUARD:
+            del _TABLE_FETCHES[key]
+
+
+def _request_moex_tables(
+    url: str, params: Optional[dict[str, Any]], key: tuple[Any, ...]
+) -> dict[str, list[dict[str, Any]]]:
+    validated = _VALIDATOR_CACHE.get(key)
+    headers: dict[str, str] = {}
+    if validated:
+        etag, last_modified, _ = validated
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = _http_get(url, params=params, headers=headers or None)
+    if validated and getattr(response, "status_code", 200) == 304:
+        _VALIDATOR_CACHE.set(key, validated)
+        return validated[2]
+
     response.raise_for_status()
-    return _parse_iss_tables(response.json())
+    tables = _parse_iss_tables(response_json(response))
+    response_headers = getattr(response, "headers", None) or {}
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if etag or last_modified:
+        _VALIDATOR_CACHE.set(key, (etag, last_modified, tables))
+    return tables
 
 
 def _parse_iss_tables(payload: Any) -> dict[str, list[dict[str, Any]]]:
@@ -816,35 +1418,92 @@ def _parse_iss_tables(payload: Any) -> dict[str, list[dict[str, Any]]]:
     return tables
 
 
-def _normalize_table(value: Any) -> list[dict[str, Any]]:
+class _IssRow(Mapping[str, Any]):
+    """Read-only mapping view over one ISS ``data`` row.
+
+    All rows of a table share one column index, so parsing a table does not
+    build a dict per row.
+    """
+
+    __slots__ = ("_index", "_data")
+
+    def __init__(self, index: dict[str, int], data: list[Any]):
+        self._index = index
+        self._data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[self._index[key]]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._index.get(key)
+        return default if position is None else self._data[position]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"_IssRow({dict(self)!r})"
+
+
+def _normalize_table(value: Any) -> list[Mapping[str, Any]]:
     if isinstance(value, list):
-        if value and isinstance(value[0], dict):
-            return value
         return value
     if isinstance(value, dict):
         columns = value.get("columns")
         data = value.get("data")
         if columns and data:
-            return [dict(zip(columns, row)) for row in data]
+            index = {name: position for position, name in enumerate(columns)}
+            width = len(columns)
+            return [
+                _IssRow(index, row) if len(row) == width else dict(zip(columns, row))
+                for row in data
+            ]
     return []
 
 
-def _safe_float(value: Any) -> Optional[float]:
-    if value in (None, ""):
+def _safe_float(value: Any, _float: Callable[[Any], float] = float) -> Optional[float]:
+    # ISS JSON numbers arrive as float/int; skip the equality test and try/except.
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return _float(value)
+    if value is None or value == "":
         return None
-    if isinstance(value, (int, float)):
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return None
+    try:
+        return _float(value)
+    except (TypeError, ValueError):
+        pass
     if isinstance(value, str):
         try:
-            return float(value.replace(",", "."))
+            return _float(value.replace(",", "."))
         except ValueError:
             return None
     return None
 
 
+def _ci_first(row: Mapping[str, Any], names: tuple[str, ...]) -> Any:
+    """Return the first truthy field among ``names``, matching keys case-insensitively."""
+
+    for name in names:
+        value = row.get(name) or row.get(name.upper())
+        if value:
+            return value
+    # Mixed-case keys are rare; only then pay for a lowered copy of the row.
+    lowered = {str(key).lower(): value for key, value in row.items()}
+    for name in names:
+        value = lowered.get(name)
+        if value:
+            return value
+    return None
+
+
 def _clean_str(value: Any) -> Optional[str]:
     if value is None:
         return None
@@ -863,19 +1522,19 @@ def _normalize_currency_code(code: Optional[str]) -> str:
 
 def _extract_currency(sec_row: dict[str, Any], md_row: dict[str, Any]) -> str:
     for source in (sec_row, md_row):
-        for key in ("FACEUNIT", "CURRENCYID", "SETTLECURRENCY"):
-            raw = source.get(key)
+        get = source.get
+        for key in _CURRENCY_FIELDS:
+            raw = get(key)
             if raw:
                 code = str(raw).upper()
-                if code in {"RUB", "SUR"}:
-                    return "SUR"
-                return code
+                return "SUR" if code in _ROUBLE_CODES else code
     return "SUR"
 
 
 def _extract_price(row: dict[str, Any]) -> Optional[float]:
-    for field in ("LAST", "LCURRENTPRICE", "MARKETPRICE3", "MARKETPRICE", "LASTTOPREVPRICE", "CLOSE"):
-        value = _safe_float(row.get(field))
+    get = row.get
+    for field in _PRICE_FIELDS:
+        value = _safe_float(get(field))
         if value is not None and value > 0:
             return value
     return None
@@ -886,6 +1545,10 @@ def _extract_lot(sec_row: dict[str, Any], md_row: dict[str, Any]) -> Optional[in
         raw = source.get("LOTSIZE")
         if raw is None:
             continue
+        if type(raw) is int:
+            if raw > 0:
+                return raw
+            continue
         try:
             lot = int(float(raw))
         except (TypeError, ValueError):
@@ -896,11 +1559,11 @@ def _extract_lot(sec_row: dict[str, Any], md_row: dict[str, Any]) -> Optional[in
 
 
 def _extract_timestamp(row: dict[str, Any]) -> Optional[datetime]:
-    for field in ("SYSTIME", "TIME", "UPDATETIME", "DATETIME"):
+    for field in _TIMESTAMP_FIELDS:
         raw = row.get(field)
         if not raw:
             continue
-        if isinstance(raw, (int, float)):
+        if isinstance(raw, _NUMERIC_TYPES):
             try:
                 return datetime.fromtimestamp(float(raw), tz=timezone.utc)
             except ValueError:
@@ -909,14 +1572,33 @@ def _extract_timestamp(row: dict[str, Any]) -> Optional[datetime]:
             cleaned = raw.strip()
             if not cleaned:
                 continue
-            iso_candidate = cleaned.replace(" ", "T").replace("Z", "+00:00")
+            if (
+                len(cleaned) == 19
+                and cleaned[4] == "-"
+                and cleaned[7] == "-"
+                and cleaned[10] in " T"
+                and cleaned[13] == ":"
+            ):
+                # ISS "YYYY-MM-DD HH:MM:SS": skip the fromisoformat/strptime ladder.
+                try:
+                    return datetime(
+                        int(cleaned[:4]),
+                        int(cleaned[5:7]),
+                        int(cleaned[8:10]),
+                        int(cleaned[11:13]),
+                        int(cleaned[14:16]),
+                        int(cleaned[17:19]),
+                        tzinfo=timezone.utc,
+                    )
+                except ValueError:
+                    pass
             try:
-                parsed = datetime.fromisoformat(iso_candidate)
+                parsed = datetime.fromisoformat(cleaned)
             except ValueError:
                 parsed = None
             if parsed is not None:
                 return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
-            for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+            for fmt in _TIMESTAMP_FORMATS:
                 try:
                     parsed = datetime.strptime(cleaned, fmt)
                 except ValueError:
@@ -925,14 +1607,27 @@ def _extract_timestamp(row: dict[str, Any]) -> Optional[datetime]:
     return None
 
 
-def _find_row_by_board(rows: list[dict[str, Any]], board: str) -> Optional[dict[str, Any]]:
-    target = board.upper()
+def _index_by_board(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Map upper-cased BOARDID/BOARD to the first row that carries it."""
+
+    index: dict[str, dict[str, Any]] = {}
     for row in rows:
-        for key in ("BOARDID", "BOARD"):
+        for key in _BOARD_FIELDS:
             value = row.get(key)
-            if value and str(value).upper() == target:
-                return row
-    return None
+            if value:
+                index.setdefault(str(value).upper(), row)
+    return index
+
+
+def _is_crypto_pair(symbol: str) -> bool:
+    if not symbol.endswith(_CRYPTO_SUFFIXES):
+        return False
+    for suffix in _CRYPTO_SUFFIXES:
+        if symbol.endswith(suffix):
+            base = symbol[: -len(suffix)]
+            if 3 <= len(base) <= 10 and base.isascii() and base.isalpha() and base.isupper():
+                return True
+    return False
 
 
 def _select_board(ticker: str, rows: list[dict[str, Any]]) -> Optional[tuple[str, str, str, bool]]:
@@ -952,8 +1647,7 @@ def _select_board(ticker: str, rows: list[dict[str, Any]]) -> Optional[tuple[str
     if not normalized:
         return None
 
-    ticker_upper = ticker.upper()
-    is_fx = ticker_upper.startswith("FX")
+    is_fx = _norm(ticker).startswith("FX")
 
     if is_fx:
         for info in normalized:
@@ -979,22 +1673,29 @@ def _select_board(ticker: str, rows: list[dict[str, Any]]) -> Optional[tuple[str
 def _is_true(value: Any) -> bool:
     if isinstance(value, bool):
         return value
-    if isinstance(value, (int, float)):
+    if isinstance(value, _NUMERIC_TYPES):
         return value != 0
     if isinstance(value, str):
-        return value.strip().lower() in {"1", "true", "yes", "y"}
+        return value.strip().lower() in _TRUE_STRINGS
     return False
 
 
-def _aggregator_route(ticker: str, fallback_reason: str) -> SourceRoute | None:
+def _preset_route(ticker: str, fallback_reason: Optional[str] = None) -> SourceRoute | None:
     preset = _ALWAYS_AGGREGATOR.get(ticker)
+    if not preset:
+        return None
+    return SourceRoute(
+        name="AGGREGATOR",
+        symbol=preset.get("symbol", f"{ticker}.MOEX"),
+        reason=preset.get("reason") or fallback_reason,
+        currency=preset.get("currency"),
+    )
+
+
+def _aggregator_route(ticker: str, fallback_reason: str) -> SourceRoute:
+    preset = _preset_route(ticker, fallback_reason)
     if preset:
-        return SourceRoute(
-            name="AGGREGATOR",
-            symbol=preset.get("symbol", f"{ticker}.MOEX"),
-            reason=preset.get("reason") or fallback_reason,
-            currency=preset.get("currency"),
-        )
+        return preset
     return SourceRoute(
         name="AGGREGATOR",
         symbol=f"{ticker}.MOEX",
@@ -1003,55 +1704,34 @@ def _aggregator_route(ticker: str, fallback_reason: str) -> SourceRoute | None:
     )
 
 
-def _market_candidates(board: str) -> list[tuple[str, str]]:
-    mapping: dict[str, list[tuple[str, str]]] = {
-        "TQBR": [("stock", "shares")],
-        "TQTD": [("stock", "shares")],
-        "SMAL": [("stock", "shares")],
-        "FQBR": [("stock", "shares")],
-        "TQTF": [("stock", "etf"), ("stock", "shares")],
-        "TQOB": [("stock", "bonds")],
-        "TQCB": [("stock", "bonds")],
-        "TQOD": [("stock", "bonds")],
-        "SNDX": [("stock", "index")],
-        "TOM": [("currency", "selt"), ("currency", "spot")],
-    }
-    candidates = mapping.get(board.upper())
-    if candidates:
-        return candidates
-    return [
-        ("stock", "shares"),
-        ("stock", "etf"),
-        ("stock", "bonds"),
-        ("stock", "index"),
-        ("currency", "selt"),
-    ]
+@lru_cache(maxsize=64)
+def _market_candidates(board: str) -> tuple[tuple[str, str], ...]:
+    return _BOARD_MARKETS.get(_norm(board), _DEFAULT_MARKETS)
 
 
 def _to_iso(value: Any) -> Optional[str]:
     if value in (None, ""):
         return None
-    if isinstance(value, (int, float)):
+    if isinstance(value, _NUMERIC_TYPES):
         try:
-            return datetime.fromtimestamp(float(value), tz=timezone.utc).isoformat().replace("+00:00", "Z")
+            return _iso_z(datetime.fromtimestamp(float(value), tz=timezone.utc))
         except ValueError:
             return None
     if isinstance(value, str):
         cleaned = value.strip()
         if not cleaned:
             return None
-        candidates = [cleaned, cleaned.replace(" ", "T")]
-        for candidate in candidates:
-            try:
-                parsed = datetime.fromisoformat(candidate.replace("Z", "+00:00"))
-            except ValueError:
-                parsed = None
-            if parsed is not None:
-                return parsed.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        # fromisoformat (3.11+) accepts "Z" and a space separator directly.
+        try:
+            parsed = datetime.fromisoformat(cleaned)
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            return _iso_z(parsed.astimezone(timezone.utc))
+        for fmt in _TIMESTAMP_FORMATS:
             try:
                 parsed = datetime.strptime(cleaned, fmt)
             except ValueError:
                 continue
-            return parsed.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+            return _iso_z(parsed.replace(tzinfo=timezone.utc))
     return None
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Any, Optional
 
 from . import _requests as requests
+from ._background import refresh_in_background
+from ._disk_cache import open_disk_cache
+from ._json import response_json
 from ._loguru import logger
 from ._tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from ._ttl_cache import TTLCache
+from .config import settings
 from .sources import IdeaSource
 
 _BASE_URL = "https://api.coingecko.com/api/v3/coins/markets"
-_CACHE_TTL = timedelta(minutes=10)
-_CACHE: dict[tuple[str, str], tuple[datetime, dict[str, Any], list[IdeaSource]]] = {}
+_CACHE_TTL = 600
+# Entries are served stale for another TTL while a background refresh runs.
+_CACHE: TTLCache[tuple[dict[str, Any], list[IdeaSource]]] = TTLCache(
+    maxsize=64, ttl=_CACHE_TTL, grace=_CACHE_TTL
+)
+_DISK_CACHE = open_disk_cache(settings.CACHE_DB_PATH)
 
 
 @retry(
@@ -31,22 +40,36 @@ def _cg_get(coin_id: str, vs_currency: str) -> requests.Response:
 
 def get_coin_market(coin_id: str, vs_currency: str = "usd") -> tuple[dict[str, Any], list[IdeaSource]]:
     key = (coin_id, vs_currency)
-    now = datetime.now(timezone.utc)
-    cached = _CACHE.get(key)
-    if cached and now - cached[0] < _CACHE_TTL:
-        return cached[1], cached[2]
+    cached, stale = _CACHE.lookup(key)
+    if cached is not None:
+        if stale:
+            refresh_in_background(("coingecko",) + key, _load_coin_market, coin_id, vs_currency)
+        return cached
+    if _DISK_CACHE is not None:
+        stored = _DISK_CACHE.get(("coingecko",) + key)
+        if stored is not None:
+            _CACHE.set(key, stored)
+            return stored
+    return _load_coin_market(coin_id, vs_currency)
+
 
+def _load_coin_market(coin_id: str, vs_currency: str) -> tuple[dict[str, Any], list[IdeaSource]]:
+    key = (coin_id, vs_currency)
     try:
         response = _cg_get(coin_id, vs_currency)
         response.raise_for_status()
     except requests.RequestException as exc:
         logger.warning("CoinGecko request failed for %s: %s", coin_id, exc)
+        previous = _CACHE.get_stale(key)
+        if previous is not None and previous[0]:
+            return previous
         data: dict[str, Any] = {}
         sources: list[IdeaSource] = []
-        _CACHE[key] = (now, data, sources)
+        _CACHE.set(key, (data, sources))
         return data, sources
 
-    payload = response.json()
+    now = datetime.now(timezone.utc)
+    payload = response_json(response)
     market = payload[0] if payload else {}
     sources: list[IdeaSource] = []
     if market:
@@ -69,7 +92,9 @@ def get_coin_market(coin_id: str, vs_currency: str = "usd") -> tuple[dict[str, A
                 date=updated,
             )
         )
-    _CACHE[key] = (now, market, sources)
+    _CACHE.set(key, (market, sources))
+    if _DISK_CACHE is not None and market:
+        _DISK_CACHE.set(("coingecko",) + key, (market, sources), ttl=_CACHE_TTL)
     return market, sources
 
 
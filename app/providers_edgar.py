@@ -1,19 +1,27 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterable, Optional
 
 from . import _requests as requests
+from ._disk_cache import open_disk_cache
+from ._json import response_json
 from ._loguru import logger
 from ._tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from ._ttl_cache import TTLCache
 from .config import settings
 from .sources import IdeaSource
 
-_TICKER_CACHE_TTL = timedelta(days=1)
-_SUBMISSION_TTL = timedelta(hours=6)
-_TICKER_CACHE: tuple[datetime, dict[str, str]] | None = None
-_SUBMISSION_CACHE: dict[str, tuple[datetime, dict]] = {}
+_TICKER_TTL = 24 * 3600
+_SUBMISSION_TTL = 6 * 3600
+_TICKER_CACHE: TTLCache[dict[str, str]] = TTLCache(maxsize=1, ttl=_TICKER_TTL)
+# Only the newest earnings filing per CIK is kept, not the whole submissions blob.
+_SUBMISSION_CACHE: TTLCache[dict[str, str]] = TTLCache(maxsize=256, ttl=_SUBMISSION_TTL)
+_DISK_CACHE = open_disk_cache(settings.CACHE_DB_PATH)
 _EARNINGS_FORMS = {"10-Q", "10-K"}
+# SEC asks clients to stay under 10 requests per second.
+_PREFETCH_WORKERS = 4
 
 
 @retry(
@@ -28,39 +36,47 @@ def _get(url: str) -> requests.Response:
 
 
 def _load_ticker_map() -> dict[str, str]:
-    global _TICKER_CACHE
-    now = datetime.now(timezone.utc)
-    if _TICKER_CACHE and now - _TICKER_CACHE[0] < _TICKER_CACHE_TTL:
-        return _TICKER_CACHE[1]
+    cached = _TICKER_CACHE.get("tickers")
+    if cached is not None:
+        return cached
+    if _DISK_CACHE is not None:
+        stored = _DISK_CACHE.get(("edgar", "tickers"))
+        if stored is not None:
+            _TICKER_CACHE.set("tickers", stored)
+            return stored
 
     url = "https://www.sec.gov/files/company_tickers.json"
     try:
         response = _get(url)
         response.raise_for_status()
-        payload = response.json()
+        payload = response_json(response)
     except requests.RequestException as exc:
         logger.warning("Failed to load SEC ticker map: %s", exc)
-        return _TICKER_CACHE[1] if _TICKER_CACHE else {}
-
-    mapping: dict[str, str] = {}
-    if isinstance(payload, list):
-        iterable = payload
-    else:
-        iterable = payload.values()
-    for entry in iterable:
-        ticker = str(entry.get("ticker") or "").upper()
-        cik = str(entry.get("cik_str") or "").zfill(10)
-        if ticker and cik:
-            mapping[ticker] = cik
-    _TICKER_CACHE = (now, mapping)
+        return _TICKER_CACHE.get_stale("tickers", {})
+
+    iterable = payload if isinstance(payload, list) else payload.values()
+    # SEC sends ``cik_str`` as an integer; format it straight to ten digits and
+    # skip malformed entries rather than failing the whole map.
+    mapping = {
+        str(entry["ticker"]).upper(): f"{int(entry['cik_str']):010d}"
+        for entry in iterable
+        if entry.get("ticker") and entry.get("cik_str") and str(entry["cik_str"]).isdigit()
+    }
+    _TICKER_CACHE.set("tickers", mapping)
+    if _DISK_CACHE is not None and mapping:
+        _DISK_CACHE.set(("edgar", "tickers"), mapping, ttl=_TICKER_TTL)
     return mapping
 
 
-def _load_submissions(cik: str) -> Optional[dict]:
-    now = datetime.now(timezone.utc)
+def _load_submissions(cik: str) -> Optional[dict[str, str]]:
     cached = _SUBMISSION_CACHE.get(cik)
-    if cached and now - cached[0] < _SUBMISSION_TTL:
-        return cached[1]
+    if cached is not None:
+        return cached
+    if _DISK_CACHE is not None:
+        stored = _DISK_CACHE.get(("edgar", cik))
+        if stored is not None:
+            _SUBMISSION_CACHE.set(cik, stored)
+            return stored
 
     url = f"https://data.sec.gov/submissions/CIK{cik}.json"
     try:
@@ -68,50 +84,80 @@ def _load_submissions(cik: str) -> Optional[dict]:
         response.raise_for_status()
     except requests.RequestException as exc:
         logger.warning("Failed to load SEC submissions for %s: %s", cik, exc)
-        return cached[1] if cached else None
+        return _SUBMISSION_CACHE.get_stale(cik)
 
-    data = response.json()
-    _SUBMISSION_CACHE[cik] = (now, data)
-    return data
+    filing = _latest_earnings_filing(response_json(response))
+    _SUBMISSION_CACHE.set(cik, filing)
+    if _DISK_CACHE is not None:
+        _DISK_CACHE.set(("edgar", cik), filing, ttl=_SUBMISSION_TTL)
+    return filing
 
 
-def get_next_report_source(ticker: str) -> Optional[IdeaSource]:
-    mapping = _load_ticker_map()
-    cik = mapping.get(ticker.upper())
-    if not cik:
-        return None
-
-    data = _load_submissions(cik)
-    if not data:
-        return None
+def _latest_earnings_filing(data: dict) -> dict[str, str]:
+    """Pick the newest 10-Q/10-K out of an EDGAR submissions payload; empty if none."""
 
     filings = data.get("filings", {}).get("recent", {})
     forms = filings.get("form", [])
+    for idx, form in enumerate(forms):
+        if form in _EARNINGS_FORMS:
+            break
+    else:
+        return {}
+
     report_dates = filings.get("reportDate", [])
     filing_dates = filings.get("filingDate", [])
     accession_numbers = filings.get("accessionNumber", [])
     documents = filings.get("primaryDocument", [])
+    return {
+        "form": form,
+        "date": report_dates[idx] if idx < len(report_dates) else filing_dates[idx],
+        "accession": accession_numbers[idx].replace("-", "") if idx < len(accession_numbers) else "",
+        "document": documents[idx] if idx < len(documents) else "",
+    }
 
-    for idx, form in enumerate(forms):
-        if form not in _EARNINGS_FORMS:
-            continue
-        date_str = report_dates[idx] if idx < len(report_dates) else filing_dates[idx]
-        try:
-            report_date = datetime.fromisoformat(date_str)
-        except Exception:
-            report_date = datetime.now(timezone.utc)
-        else:
-            if report_date.tzinfo is None:
-                report_date = report_date.replace(tzinfo=timezone.utc)
-        accession = accession_numbers[idx].replace("-", "") if idx < len(accession_numbers) else ""
-        document = documents[idx] if idx < len(documents) else ""
-        url = (
-            f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{document}"
-            if accession and document
-            else f"https://www.sec.gov/cgi-bin/browse-edgar?CIK={cik}"
-        )
-        return IdeaSource(url=url, name=f"SEC {form}", date=report_date)
-    return None
+
+def prefetch_submissions(tickers: Iterable[str]) -> int:
+    """Load submissions for every known ticker concurrently; returns how many were fetched."""
+
+    try:
+        mapping = _load_ticker_map()
+        ciks = {mapping[t.upper()] for t in tickers if t.upper() in mapping}
+        missing = [cik for cik in ciks if _SUBMISSION_CACHE.get(cik) is None]
+        if not missing:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(_PREFETCH_WORKERS, len(missing))) as pool:
+            list(pool.map(_load_submissions, missing))
+        return len(missing)
+    except Exception as exc:  # pragma: no cover - warming is best effort
+        logger.warning("SEC submissions prefetch failed: %s", exc)
+        return 0
+
+
+def get_next_report_source(ticker: str) -> Optional[IdeaSource]:
+    mapping = _load_ticker_map()
+    cik = mapping.get(ticker.upper())
+    if not cik:
+        return None
+
+    filing = _load_submissions(cik)
+    if not filing:
+        return None
+
+    try:
+        report_date = datetime.fromisoformat(filing["date"])
+    except Exception:
+        report_date = datetime.now(timezone.utc)
+    else:
+        if report_date.tzinfo is None:
+            report_date = report_date.replace(tzinfo=timezone.utc)
+    accession = filing["accession"]
+    document = filing["document"]
+    url = (
+        f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{document}"
+        if accession and document
+        else f"https://www.sec.gov/cgi-bin/browse-edgar?CIK={cik}"
+    )
+    return IdeaSource(url=url, name=f"SEC {filing['form']}", date=report_date)
 
 
 def get_sources(ticker: str) -> list[IdeaSource]:
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Optional
 
 from . import _requests as requests
+from ._background import refresh_in_background
+from ._disk_cache import open_disk_cache
+from ._json import response_json
 from ._loguru import logger
 from ._tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from ._ttl_cache import TTLCache
 from .config import settings
 from .sources import IdeaSource
 
 _BASE_URL = "https://api.stlouisfed.org/fred/series/observations"
-_CACHE_TTL = timedelta(hours=6)
-_CACHE: dict[str, tuple[datetime, Optional[float], list[IdeaSource]]] = {}
+_CACHE_TTL = 6 * 3600
+# Entries are served stale for another TTL while a background refresh runs.
+_CACHE: TTLCache[tuple[Optional[float], list[IdeaSource]]] = TTLCache(
+    maxsize=64, ttl=_CACHE_TTL, grace=_CACHE_TTL
+)
+_DISK_CACHE = open_disk_cache(settings.CACHE_DB_PATH)
 
 
 @retry(
@@ -36,15 +44,24 @@ def _fred_get(series_id: str) -> requests.Response:
 def get_latest_value(series_id: str, label: str) -> tuple[Optional[float], list[IdeaSource]]:
     """Return latest observation value and metadata for the given FRED series."""
 
-    now = datetime.now(timezone.utc)
-    cached = _CACHE.get(series_id)
-    if cached and now - cached[0] < _CACHE_TTL:
-        return cached[1], cached[2]
+    cached, stale = _CACHE.lookup(series_id)
+    if cached is not None:
+        if stale:
+            refresh_in_background(("fred", series_id), _load_latest_value, series_id, label)
+        return cached
+    if _DISK_CACHE is not None:
+        stored = _DISK_CACHE.get(("fred", series_id))
+        if stored is not None:
+            _CACHE.set(series_id, stored)
+            return stored
+    return _load_latest_value(series_id, label)
 
+
+def _load_latest_value(series_id: str, label: str) -> tuple[Optional[float], list[IdeaSource]]:
     if not settings.FRED_API_KEY:
         logger.warning("FRED API key missing; returning empty data for %s", series_id)
         sources: list[IdeaSource] = []
-        _CACHE[series_id] = (now, None, sources)
+        _CACHE.set(series_id, (None, sources))
         return None, sources
 
     try:
@@ -52,11 +69,15 @@ def get_latest_value(series_id: str, label: str) -> tuple[Optional[float], list[
         response.raise_for_status()
     except requests.RequestException as exc:
         logger.warning("Failed to fetch FRED series %s: %s", series_id, exc)
+        previous = _CACHE.get_stale(series_id)
+        if previous is not None and previous[0] is not None:
+            return previous
         sources = []
-        _CACHE[series_id] = (now, None, sources)
+        _CACHE.set(series_id, (None, sources))
         return None, sources
 
-    data = response.json()
+    now = datetime.now(timezone.utc)
+    data = response_json(response)
     observations = data.get("observations", [])
     value: Optional[float] = None
     sources: list[IdeaSource] = []
@@ -78,7 +99,9 @@ def get_latest_value(series_id: str, label: str) -> tuple[Optional[float], list[
                 date=obs_date,
             )
         )
-    _CACHE[series_id] = (now, value, sources)
+    _CACHE.set(series_id, (value, sources))
+    if _DISK_CACHE is not None and value is not None:
+        _DISK_CACHE.set(("fred", series_id), (value, sources), ttl=_CACHE_TTL)
     return value, sources
 
 
@@ -1,15 +1,54 @@
+import asyncio
 from datetime import datetime
+from typing import Iterable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import or_, select
 from telegram.ext import Application
 
 from ._loguru import logger
+from .config import settings
 from .db import SessionLocal
 from .formatting import fmt_amount, format_idea_digest
 from .ideas import generate_ideas, rank_and_filter
 from .models import User
-from .formatting import fmt_amount
-from .strategy import propose_allocation
+from .providers import prefetch_quotes
+from .strategy import propose_allocation, template_tickers
+
+# Telegram allows ~30 messages per second per bot; stay comfortably below it.
+_SEND_CONCURRENCY = 20
+
+_PAYDAY_TEXT = (
+    "Сегодня день выплаты (аванс/зарплата). Получил доход?\n"
+    "Открой бот, нажми «Внести взнос» и введи сумму — я предложу распределение.\n"
+    "Если параметры поменялись, запусти /setup."
+)
+_NUDGE_TEMPLATE = (
+    "Напоминание про взнос. "
+    "Цель: {target}\n{block}\n"
+    "Когда будешь готов, нажми «Внести взнос» и введи сумму."
+)
+_NUDGE_LINE = "- {label}: {amount} ₽ (~{percent}%)"
+
+
+async def _send_all(app: Application, messages: Iterable[tuple[int, str]]) -> None:
+    """Send ``(chat_id, text)`` pairs concurrently; one failed chat does not stop the rest."""
+
+    semaphore = asyncio.Semaphore(_SEND_CONCURRENCY)
+
+    async def send(chat_id: int, text: str) -> None:
+        async with semaphore:
+            await app.bot.send_message(chat_id, text)
+
+    batch = list(messages)
+    results = await asyncio.gather(
+        *(send(chat_id, text) for chat_id, text in batch), return_exceptions=True
+    )
+    for (chat_id, _), result in zip(batch, results):
+        if isinstance(result, Exception):
+            logger.warning("Failed to send message to %s: %s", chat_id, result)
+
 
 def setup_jobs(app: Application, tz: str):
     sch = AsyncIOScheduler(timezone=tz)
@@ -17,61 +56,80 @@ def setup_jobs(app: Application, tz: str):
     @sch.scheduled_job(CronTrigger(hour=10, minute=0))
     async def ping_income_days():
         today = datetime.now(sch.timezone).day
+        query = select(User.user_id).where(or_(User.advance_day == today, User.salary_day == today))
         with SessionLocal() as s:
-            users = s.query(User).all()
-            for u in users:
-                if today in (u.advance_day, u.salary_day):
-                    text = (
-                        "Сегодня день выплаты (аванс/зарплата). Получил доход?\n"
-                        "Открой бот, нажми «Внести взнос» и введи сумму — я предложу распределение.\n"
-                        "Если параметры поменялись, запусти /setup."
-                    )
-                    await app.bot.send_message(u.user_id, text)
+            recipients = s.scalars(query).all()
+        await _send_all(app, ((user_id, _PAYDAY_TEXT) for user_id in recipients))
 
     @sch.scheduled_job(CronTrigger(day="15", hour=11, minute=0))
     async def soft_nudge():
+        messages = []
+        # Users with the same contribution band and risk get the same reminder.
+        texts: dict[tuple[float, str | None], str] = {}
         with SessionLocal() as s:
-            users = s.query(User).all()
-            for u in users:
-                advice = propose_allocation((u.min_contrib + u.max_contrib) / 2, u.risk)
-                lines = []
-                for line in advice.plan:
-                    percent = round(line.weight * 100)
-                    lines.append(f"- {line.label}: {fmt_amount(line.amount)} ₽ (~{percent}%)")
-                block = "\n".join(lines)
-                text = (
-                    "Напоминание про взнос. "
-                    f"Цель: {advice.target}\n{block}\n"
-                    "Когда будешь готов, нажми «Внести взнос» и введи сумму."
+            users = s.execute(
+                select(User.user_id, User.min_contrib, User.max_contrib, User.risk)
+            ).all()
+        for u in users:
+            key = ((u.min_contrib + u.max_contrib) / 2, u.risk)
+            cached = texts.get(key)
+            if cached is not None:
+                messages.append((u.user_id, cached))
+                continue
+            advice = await asyncio.to_thread(propose_allocation, *key)
+            block = "\n".join(
+                _NUDGE_LINE.format(
+                    label=line.label, amount=fmt_amount(line.amount), percent=round(line.weight * 100)
                 )
-                if advice.analytics:
-                    extra = advice.analytics.get("title")
-                    source = advice.analytics.get("source", "MOEX")
-                    url = advice.analytics.get("url")
-                    if extra:
-                        text += f"\n\nСвежая аналитика {source}: {extra}"
-                    if url:
-                        text += f"\n{url}"
-                await app.bot.send_message(u.user_id, text)
+                for line in advice.plan
+            )
+            text = _NUDGE_TEMPLATE.format_map({"target": advice.target, "block": block})
+            if advice.analytics:
+                extra = advice.analytics.get("title")
+                source = advice.analytics.get("source", "MOEX")
+                url = advice.analytics.get("url")
+                if extra:
+                    text += f"\n\nСвежая аналитика {source}: {extra}"
+                if url:
+                    text += f"\n{url}"
+            texts[key] = text
+            messages.append((u.user_id, text))
+        await _send_all(app, messages)
 
     @sch.scheduled_job(CronTrigger(hour=10, minute=30))
     async def push_daily_ideas():
         with SessionLocal() as s:
-            users = s.query(User).all()
+            users = s.execute(select(User.user_id, User.risk)).all()
+        # Ideas depend only on the risk profile: build each digest once per job.
+        digests: dict[str, str | None] = {}
+        messages = []
         for u in users:
-            try:
-                ideas = rank_and_filter(generate_ideas(u.risk or "balanced"))
-            except Exception as exc:  # pragma: no cover
-                logger.warning("Ideas digest failed for %s: %s", u.user_id, exc)
-                continue
-            if not ideas:
-                continue
-            digest = "\n\n".join(format_idea_digest(item) for item in ideas)
-            header = "Идеи на сегодня:" if len(ideas) > 1 else "Идея дня:"
-            await app.bot.send_message(
-                u.user_id,
-                f"{header}\n{digest}",
-            )
+            risk = u.risk or "balanced"
+            if risk not in digests:
+                digests[risk] = None
+                try:
+                    generated = await asyncio.to_thread(generate_ideas, risk)
+                    ideas = rank_and_filter(generated)
+                except Exception as exc:  # pragma: no cover
+                    logger.warning("Ideas digest failed for risk %s: %s", risk, exc)
+                    ideas = []
+                if ideas:
+                    digest = "\n\n".join(format_idea_digest(item) for item in ideas)
+                    header = "Идеи на сегодня:" if len(ideas) > 1 else "Идея дня:"
+                    digests[risk] = f"{header}\n{digest}"
+            text = digests[risk]
+            if text:
+                messages.append((u.user_id, text))
+        await _send_all(app, messages)
+
+    if settings.QUOTE_WARMUP_SEC:
+        @sch.scheduled_job(
+            IntervalTrigger(seconds=settings.QUOTE_WARMUP_SEC),
+            next_run_time=datetime.now(sch.timezone),
+        )
+        async def warm_quote_cache():
+            loaded = await asyncio.to_thread(prefetch_quotes, template_tickers())
+            logger.debug("Quote cache warmed: %s tickers", loaded)
 
     sch.start()
 
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Iterable, Protocol, Sequence
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class IdeaSource:
+    """Immutable so provider caches can hand the same instance to every user."""
+
     url: str
     name: str
     date: datetime
+    is_news: bool = field(init=False, default=False)
+
+    def __post_init__(self) -> None:
+        # Names come from a handful of labels ("SEC 10-Q", "CoinGecko Bitcoin", ...).
+        name = sys.intern(self.name)
+        lowered = name.lower()
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "is_news", "аналит" in lowered or "sec" in lowered)
 
 
 class SourceProvider(Protocol):
@@ -22,13 +33,17 @@ def filter_fresh_sources(
     max_age_days: int,
     as_of: datetime | None = None,
 ) -> list[IdeaSource]:
-    pivot = _to_utc(as_of or datetime.now(timezone.utc))
-    fresh: list[IdeaSource] = []
-    for item in sources:
-        item_date = _to_utc(item.date)
-        if (pivot - item_date).days <= max_age_days:
-            fresh.append(item)
-    return fresh
+    pivot_ts = _to_utc(as_of or datetime.now(timezone.utc)).timestamp()
+    # ``timedelta.days`` floors, so "at most N whole days old" means under N + 1 days.
+    limit = (max_age_days + 1) * 86400
+    utc = timezone.utc
+    return [
+        item
+        for item in sources
+        if pivot_ts
+        - (item.date.replace(tzinfo=utc) if item.date.tzinfo is None else item.date).timestamp()
+        < limit
+    ]
 
 
 def _to_utc(moment: datetime) -> datetime:
@@ -1,21 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, replace
+import heapq
+from dataclasses import dataclass
 from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from functools import lru_cache
 from typing import Optional
 
 from .brokers import tinkoff_filter
 from .config import settings
 from .providers import (
-    MarketDataError,
     Quote,
     get_key_rate,
     get_market_commentary,
-    get_quote,
+    get_quotes,
 )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PortfolioAsset:
     label: str
     tag: str
@@ -48,8 +49,9 @@ class AllocationAdvice:
     analytics: Optional[dict[str, str]] = None
 
 
-PORTFOLIO_TEMPLATES: dict[str, list[PortfolioAsset]] = {
-    "conservative": [
+# Templates are immutable; allocation works on a parallel list of weights.
+PORTFOLIO_TEMPLATES: dict[str, tuple[PortfolioAsset, ...]] = {
+    "conservative": (
         PortfolioAsset("Резерв (наличные)", "cash", 0.25, type="cash"),
         PortfolioAsset("FXMM (денежный рынок)", "bonds", 0.20, ticker="FXMM", board="TQTF"),
         PortfolioAsset("SBGB (ОФЗ через ETF)", "bonds", 0.20, ticker="SBGB", board="TQTF"),
@@ -57,8 +59,8 @@ PORTFOLIO_TEMPLATES: dict[str, list[PortfolioAsset]] = {
         PortfolioAsset("Роснефть (ROSN)", "dividends", 0.10, ticker="ROSN", board="TQBR"),
         PortfolioAsset("Газпром (GAZP)", "dividends", 0.05, ticker="GAZP", board="TQBR"),
         PortfolioAsset("FXGD (золото)", "gold", 0.10, ticker="FXGD", board="TQTF"),
-    ],
-    "balanced": [
+    ),
+    "balanced": (
         PortfolioAsset("Резерв (наличные)", "cash", 0.10, type="cash"),
         PortfolioAsset("Сбербанк (SBER)", "core_equity", 0.15, ticker="SBER", board="TQBR"),
         PortfolioAsset("Яндекс (YNDX)", "growth", 0.10, ticker="YNDX", board="TQBR"),
@@ -68,8 +70,8 @@ PORTFOLIO_TEMPLATES: dict[str, list[PortfolioAsset]] = {
         PortfolioAsset("FXRB (облигации)", "bonds", 0.15, ticker="FXRB", board="TQTF"),
         PortfolioAsset("FXGD (золото)", "gold", 0.10, ticker="FXGD", board="TQTF"),
         PortfolioAsset("CRPT (крипто ETF)", "alternatives", 0.10, ticker="CRPT", board="TQTF"),
-    ],
-    "aggressive": [
+    ),
+    "aggressive": (
         PortfolioAsset("Резерв (наличные)", "cash", 0.05, type="cash"),
         PortfolioAsset("Яндекс (YNDX)", "growth", 0.15, ticker="YNDX", board="TQBR"),
         PortfolioAsset("TCS Group (TCSG)", "growth", 0.10, ticker="TCSG", board="TQBR"),
@@ -81,10 +83,15 @@ PORTFOLIO_TEMPLATES: dict[str, list[PortfolioAsset]] = {
         PortfolioAsset("CRPT (крипто ETF)", "alternatives", 0.10, ticker="CRPT", board="TQTF"),
         PortfolioAsset("FXGD (золото)", "gold", 0.05, ticker="FXGD", board="TQTF"),
         PortfolioAsset("FXRB (облигации)", "bonds", 0.05, ticker="FXRB", board="TQTF"),
-    ],
+    ),
 }
 
 
+# Fixed-point precision for weights when splitting amounts (fifteen decimal places).
+_WEIGHT_SCALE = 10**15
+_RUBLE = Decimal("1")
+_KOPECK = Decimal("0.01")
+
 TARGET_TEXT = {
     "conservative": "≈12–17% годовых при ключевой ставке {rate:.1f}%",
     "balanced": "≈18–20% годовых при ключевой ставке {rate:.1f}%",
@@ -94,7 +101,15 @@ TARGET_TEXT = {
 
 def portfolio_assets(risk: str) -> list[PortfolioAsset]:
     profile = risk if risk in PORTFOLIO_TEMPLATES else "balanced"
-    return [replace(asset) for asset in PORTFOLIO_TEMPLATES[profile]]
+    return list(PORTFOLIO_TEMPLATES[profile])
+
+
+def template_tickers() -> list[str]:
+    """Every ticker used by the portfolio templates, for cache warm-up."""
+
+    return sorted(
+        {asset.ticker for assets in PORTFOLIO_TEMPLATES.values() for asset in assets if asset.ticker}
+    )
 
 
 def baseline_tickers(risk: str) -> list[tuple[str, str]]:
@@ -107,68 +122,63 @@ def baseline_tickers(risk: str) -> list[tuple[str, str]]:
 
 def propose_allocation(amount: float, risk: str) -> AllocationAdvice:
     profile = risk if risk in PORTFOLIO_TEMPLATES else "balanced"
-    assets = portfolio_assets(profile)
+    assets = PORTFOLIO_TEMPLATES[profile]
+    weights = [asset.weight for asset in assets]
+    tags = [asset.tag for asset in assets]
 
     kr = get_key_rate()
     kr_percent = _rate_to_percent(kr)
 
     if profile == "conservative":
-        _apply_rate_shift(assets, "bonds", "dividends", kr_percent, baseline=11.0, sensitivity=0.01)
+        shifted = _apply_rate_shift(
+            weights, tags, "bonds", "dividends", kr_percent, baseline=11.0, sensitivity=0.01
+        )
     elif profile == "aggressive":
-        _apply_rate_shift(assets, "bonds", "growth", kr_percent, baseline=11.5, sensitivity=0.006)
-    else:
-        _apply_rate_shift(assets, "bonds", "growth", kr_percent, baseline=11.0, sensitivity=0.008)
-
-    _normalize_weights(assets)
-
-    total_amount = int(Decimal(str(amount)).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
-    raw_values = [Decimal(str(asset.weight)) * Decimal(total_amount) for asset in assets]
-    amounts = [int(value.to_integral_value(rounding=ROUND_DOWN)) for value in raw_values]
-
-    remainder = total_amount - sum(amounts)
-    if remainder > 0:
-        order = sorted(
-            enumerate(raw_values),
-            key=lambda item: item[1] - Decimal(amounts[item[0]]),
-            reverse=True,
+        shifted = _apply_rate_shift(
+            weights, tags, "bonds", "growth", kr_percent, baseline=11.5, sensitivity=0.006
         )
-        idx = 0
-        while remainder > 0 and order:
-            index = order[idx % len(order)][0]
-            amounts[index] += 1
-            remainder -= 1
-            idx += 1
-    elif remainder < 0:
-        order = sorted(
-            enumerate(raw_values),
-            key=lambda item: item[1] - Decimal(amounts[item[0]]),
+    else:
+        shifted = _apply_rate_shift(
+            weights, tags, "bonds", "growth", kr_percent, baseline=11.0, sensitivity=0.008
         )
-        idx = 0
-        while remainder < 0 and order:
-            index = order[idx % len(order)][0]
-            if amounts[index] > 0:
-                amounts[index] -= 1
-                remainder += 1
-            idx += 1
+
+    if shifted:
+        _normalize_weights(weights)
+    else:
+        weights = list(_template_weights(profile))
+
+    total_amount = int(Decimal(str(amount)).quantize(_RUBLE, rounding=ROUND_HALF_UP))
+    amounts = _split_amount(weights, total_amount)
+
+    quoted = [asset.type != "cash" and bool(asset.ticker) for asset in assets]
+    blocked = [
+        needs_quote and _unavailable_in_tbank(asset) for asset, needs_quote in zip(assets, quoted)
+    ]
+    # One batched quote request per MOEX board instead of one per line.
+    wanted = [
+        asset.ticker
+        for asset, needs_quote, skip in zip(assets, quoted, blocked)
+        if needs_quote and not skip
+    ]
+    quotes_failed = False
+    try:
+        quotes = get_quotes(wanted)
+    except Exception:
+        quotes, quotes_failed = {}, True
 
     plan: list[AllocationLine] = []
-    for asset, amount_value in zip(assets, amounts):
+    for asset, weight, amount_value, needs_quote, skip in zip(assets, weights, amounts, quoted, blocked):
         line = AllocationLine(
             label=asset.label,
-            weight=asset.weight,
+            weight=weight,
             amount=amount_value,
             type=asset.type,
             ticker=asset.ticker,
             board=asset.board,
         )
 
-        if asset.type != "cash" and asset.ticker:
-            sec_type = _classify_security(asset)
-            if (
-                settings.TINKOFF_FILTER_ENABLED
-                and sec_type is not None
-                and not tinkoff_filter.is_tradable(asset.ticker, sec_type)
-            ):
+        if needs_quote:
+            if skip:
                 line.note = "Недоступно в Т-Банке"
                 line.quote = Quote(
                     ticker=asset.ticker.upper(),
@@ -182,12 +192,11 @@ def propose_allocation(amount: float, risk: str) -> AllocationAdvice:
                 plan.append(line)
                 continue
 
-            try:
-                quote = get_quote(asset.ticker)
-            except MarketDataError:
-                line.note = "котировку не удалось получить"
-            except Exception:
-                line.note = "ошибка при получении котировки"
+            quote = quotes.get(asset.ticker.upper())
+            if quote is None:
+                line.note = (
+                    "ошибка при получении котировки" if quotes_failed else "котировку не удалось получить"
+                )
             else:
                 line.quote = quote
                 if quote.price is None or quote.price <= 0:
@@ -195,21 +204,11 @@ def propose_allocation(amount: float, risk: str) -> AllocationAdvice:
                 elif quote.lot in (None, 0):
                     pass
                 else:
-                    lot_cost = Decimal(str(quote.price)) * Decimal(quote.lot)
-                    if lot_cost > 0:
-                        lots = int(
-                            (Decimal(amount_value) / lot_cost).to_integral_value(
-                                rounding=ROUND_DOWN
-                            )
-                        )
+                    purchase = _buy_lots(amount_value, quote.price, quote.lot)
+                    if purchase is not None:
+                        lots, line.invested, line.leftover = purchase
                         line.lots = lots
                         line.units = lots * quote.lot
-                        invested = (lot_cost * lots).quantize(
-                            Decimal("0.01"), rounding=ROUND_HALF_UP
-                        )
-                        line.invested = float(invested)
-                        leftover = Decimal(amount_value) - invested
-                        line.leftover = float(leftover)
                     else:
                         line.note = "некорректная цена от источника"
 
@@ -237,53 +236,124 @@ def _classify_security(asset: PortfolioAsset) -> str | None:
     return "stock"
 
 
+def _unavailable_in_tbank(asset: PortfolioAsset) -> bool:
+    if not settings.TINKOFF_FILTER_ENABLED:
+        return False
+    sec_type = _classify_security(asset)
+    return sec_type is not None and not tinkoff_filter.is_tradable(asset.ticker, sec_type)
+
+
+def _split_amount(weights: list[float], total: int) -> list[int]:
+    """Split ``total`` proportionally to ``weights`` by the largest-remainder method.
+
+    Weights are fixed-point scaled so the shares and their remainders are exact integers.
+    """
+
+    shares = [round(weight * _WEIGHT_SCALE) * total for weight in weights]
+    amounts = [share // _WEIGHT_SCALE for share in shares]
+    remainders = [share % _WEIGHT_SCALE for share in shares]
+
+    remainder = total - sum(amounts)
+    if 0 < remainder <= len(amounts):
+        # The usual case: each of the largest remainders gets one more rouble.
+        for index in heapq.nlargest(remainder, range(len(amounts)), key=remainders.__getitem__):
+            amounts[index] += 1
+    elif remainder > 0:
+        order = sorted(range(len(amounts)), key=remainders.__getitem__, reverse=True)
+        for step in range(remainder):
+            amounts[order[step % len(order)]] += 1
+    elif remainder < 0:
+        order = sorted(range(len(amounts)), key=remainders.__getitem__)
+        step = 0
+        while remainder < 0:
+            index = order[step % len(order)]
+            if amounts[index] > 0:
+                amounts[index] -= 1
+                remainder += 1
+            step += 1
+    return amounts
+
+
+def _buy_lots(budget: int, price: float, lot: int) -> Optional[tuple[int, float, float]]:
+    """Whole lots affordable with ``budget`` as ``(lots, invested, leftover)``; None for a bad lot cost.
+
+    Prices in whole kopecks (almost every MOEX quote) are handled in integer kopecks;
+    finer prices fall back to Decimal. Both paths give the same figures.
+    """
+
+    kopecks = round(price * 100)
+    if kopecks / 100 == price:
+        lot_cost = kopecks * lot
+        if lot_cost <= 0:
+            return None
+        lots = budget * 100 // lot_cost
+        invested = lot_cost * lots
+        return lots, invested / 100, (budget * 100 - invested) / 100
+
+    lot_cost = Decimal(str(price)) * lot
+    if lot_cost <= 0:
+        return None
+    lots = int((budget / lot_cost).to_integral_value(rounding=ROUND_DOWN))
+    invested = (lot_cost * lots).quantize(_KOPECK, rounding=ROUND_HALF_UP)
+    return lots, float(invested), float(budget - invested)
+
+
 def _apply_rate_shift(
-    assets: list[PortfolioAsset],
+    weights: list[float],
+    tags: list[str],
     increase_tag: str,
     decrease_tag: str,
     kr_percent: float,
     baseline: float,
     sensitivity: float,
-) -> None:
+) -> bool:
+    """Move weight between two tag groups with the key rate; False if nothing changed."""
+
     shift = max(min((kr_percent - baseline) * sensitivity, 0.05), -0.05)
     if abs(shift) < 1e-4:
-        return
-
-    inc_items = [asset for asset in assets if asset.tag == increase_tag]
-    dec_items = [asset for asset in assets if asset.tag == decrease_tag]
+        return False
+
+    # One pass over the tags; only the shifted lines can drop below zero.
+    inc_items: list[int] = []
+    dec_items: list[int] = []
+    inc_total = dec_total = 0.0
+    for i, tag in enumerate(tags):
+        if tag == increase_tag:
+            inc_items.append(i)
+            inc_total += weights[i]
+        elif tag == decrease_tag:
+            dec_items.append(i)
+            dec_total += weights[i]
     if not inc_items or not dec_items:
-        return
-
-    inc_total = sum(asset.weight for asset in inc_items)
-    dec_total = sum(asset.weight for asset in dec_items)
+        return False
     if inc_total <= 0 and shift < 0:
-        return
+        return False
     if dec_total <= 0 and shift > 0:
-        return
-
-    for asset in inc_items:
-        portion = asset.weight / inc_total if inc_total else 1 / len(inc_items)
-        asset.weight += shift * portion
-
-    for asset in dec_items:
-        portion = asset.weight / dec_total if dec_total else 1 / len(dec_items)
-        asset.weight -= shift * portion
+        return False
 
-    for asset in assets:
-        if asset.weight < 0:
-            asset.weight = 0.0
+    for items, total, delta in ((inc_items, inc_total, shift), (dec_items, dec_total, -shift)):
+        for i in items:
+            portion = weights[i] / total if total else 1 / len(items)
+            weights[i] = max(weights[i] + delta * portion, 0.0)
+    return True
 
 
-def _normalize_weights(assets: list[PortfolioAsset]) -> None:
-    total = sum(max(asset.weight, 0.0) for asset in assets)
+def _normalize_weights(weights: list[float]) -> None:
+    total = sum(max(weight, 0.0) for weight in weights)
     if total <= 0:
-        equal = 1 / len(assets)
-        for asset in assets:
-            asset.weight = equal
+        weights[:] = [1 / len(weights)] * len(weights)
         return
 
-    for asset in assets:
-        asset.weight = max(asset.weight, 0.0) / total
+    weights[:] = [max(weight, 0.0) / total for weight in weights]
+
+
+@lru_cache(maxsize=None)
+def _template_weights(profile: str) -> tuple[float, ...]:
+    """Normalised weights of an unshifted template, computed once per profile."""
+
+    weights = [asset.weight for asset in PORTFOLIO_TEMPLATES[profile]]
+    _normalize_weights(weights)
+    return tuple(weights)
 
 
 def _rate_to_percent(value: float) -> float:
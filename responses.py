@@ -1,7 +1,7 @@
 """Minimal subset of the responses API for offline tests."""
 from __future__ import annotations
 
-import json
+import copy
 import re
 from contextlib import contextmanager
 from functools import wraps
@@ -13,18 +13,21 @@ from app import _requests as requests
 
 GET = "GET"
 
-_registry: list[tuple[str, Any, dict[str, Any], int]] = []
+_registry: list[tuple[str, Callable[[str], Any], dict[str, Any], int]] = []
 calls: list[SimpleNamespace] = []
 
 
 def add(method: str, url: str | Pattern[str], json: dict[str, Any], status: int = 200) -> None:
-    _registry.append((method, url, json, status))
+    _registry.append((method, _matcher(url), json, status))
 
 
-def _match(url: str, target: str | Pattern[str]) -> bool:
+def _matcher(target: str | Pattern[str]) -> Callable[[str], Any]:
+    """Resolve the match rule once at registration instead of on every request."""
+
     if isinstance(target, re.Pattern):
-        return bool(target.match(url))
-    return url == target or url.startswith(f"{target}?")
+        return target.match
+    with_query = f"{target}?"
+    return lambda url: url == target or url.startswith(with_query)
 
 
 def _build_url(url: str, params: dict[str, Any] | None) -> str:
@@ -39,7 +42,8 @@ class _DummyResponse:
         self.status_code = status
 
     def json(self) -> dict[str, Any]:
-        return json.loads(json.dumps(self._payload))
+        # A private copy per call, as a real response would decode fresh objects.
+        return copy.deepcopy(self._payload)
 
     def raise_for_status(self) -> None:
         if not (200 <= self.status_code < 400):
@@ -52,8 +56,8 @@ def _patched() -> Callable[..., Any]:
 
     def fake_get(url: str, params: dict[str, Any] | None = None, **kwargs: Any):
         full_url = _build_url(url, params)
-        for method, target, payload, status in list(_registry):
-            if method == GET and _match(full_url, target):
+        for method, matches, payload, status in _registry:
+            if method == GET and matches(full_url):
                 calls.append(SimpleNamespace(request=SimpleNamespace(url=full_url), response=SimpleNamespace(status=status)))
                 return _DummyResponse(payload, status=status)
         raise AssertionError(f"Unexpected GET {full_url}")
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 import argparse
 import csv
+import re
 from pathlib import Path
 from typing import Iterable
 
-import yaml
-
 DEFAULT_OUTPUT = Path("data/tbank_universe.yml")
 DELIMITERS = ",;\t"
+_DIGIT = re.compile(r"\d")
+_ETF_PREFIXES = ("FX", "SB", "VTB")
 
 
 def _normalize_symbol(raw: str) -> str | None:
@@ -21,15 +22,17 @@ def _normalize_symbol(raw: str) -> str | None:
 
 
 def _guess_type(symbol: str) -> str:
-    if symbol.startswith("SU") or any(ch.isdigit() for ch in symbol[2:]):
+    if symbol.startswith("SU") or _DIGIT.search(symbol, 2):
         return "bond"
-    if symbol.startswith("FX") or symbol.startswith("SB") or symbol.startswith("VTB"):
+    if symbol.startswith(_ETF_PREFIXES):
         return "etf"
     return "stock"
 
 
-def _iter_rows(path: Path) -> Iterable[dict[str, str]]:
-    with path.open("r", encoding="utf-8-sig") as fh:
+def _iter_rows(path: Path) -> Iterable[tuple[str, str]]:
+    """Yield raw ``(ticker, type)`` pairs, resolving header columns once per file."""
+
+    with path.open("r", encoding="utf-8-sig", newline="") as fh:
         sample = fh.read(4096)
         fh.seek(0)
         try:
@@ -41,35 +44,44 @@ def _iter_rows(path: Path) -> Iterable[dict[str, str]]:
         except csv.Error:
             has_header = True
 
+        reader = csv.reader(fh, dialect=dialect)
         if has_header:
-            reader = csv.DictReader(fh, dialect=dialect)
-            for row in reader:
-                yield {k.strip().upper(): (v or "").strip() for k, v in row.items()}
+            header = [name.strip().upper() for name in next(reader, [])]
+            ticker_columns = [header.index(name) for name in ("TICKER", "TICKER;BOARD") if name in header]
+            type_column = header.index("TYPE") if "TYPE" in header else -1
         else:
-            reader = csv.reader(fh, dialect=dialect)
-            for row in reader:
-                if not row:
-                    continue
-                ticker = row[0] if len(row) > 0 else ""
-                sec_type = row[1] if len(row) > 1 else ""
-                yield {"TICKER": ticker, "TYPE": sec_type}
+            ticker_columns, type_column = [0], 1
+        primary = ticker_columns[0] if ticker_columns else -1
+        fallbacks = ticker_columns[1:]
+
+        for row in reader:
+            if not row:
+                continue
+            width = len(row)
+            ticker = row[primary] if 0 <= primary < width else ""
+            if fallbacks and not ticker.strip():
+                ticker = next((row[c] for c in fallbacks if c < width and row[c].strip()), "")
+            sec_type = row[type_column] if 0 <= type_column < width else ""
+            yield ticker, sec_type
 
 
 def load_csv(path: Path) -> dict[str, set[str]]:
     result = {"stocks": set(), "bonds": set(), "etfs": set()}
-    for row in _iter_rows(path):
-        ticker_raw = row.get("TICKER") or row.get("TICKER;BOARD") or ""
+    buckets = {"stock": result["stocks"], "bond": result["bonds"], "etf": result["etfs"]}
+    for ticker_raw, sec_type in _iter_rows(path):
         symbol = _normalize_symbol(ticker_raw)
         if not symbol:
             continue
-        sec_type = row.get("TYPE", "").strip().lower()
-        if sec_type not in {"stock", "bond", "etf"}:
-            sec_type = _guess_type(symbol)
-        result.setdefault(sec_type + "s", set()).add(symbol)
+        bucket = buckets.get(sec_type.strip().lower())
+        if bucket is None:
+            bucket = buckets[_guess_type(symbol)]
+        bucket.add(symbol)
     return result
 
 
 def write_yaml(data: dict[str, set[str]], output: Path) -> None:
+    import yaml  # only the final write needs PyYAML
+
     structured = {key: sorted(values) for key, values in data.items() if values}
     output.parent.mkdir(parents=True, exist_ok=True)
     with output.open("w", encoding="utf-8") as fh:
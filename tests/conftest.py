@@ -8,3 +8,4 @@ if str(ROOT) not in sys.path:
 
 os.environ.setdefault("BOT_TOKEN", "TEST_TOKEN")
 os.environ.setdefault("TZ", "Europe/Moscow")
+os.environ.setdefault("CACHE_DB_PATH", "")
@@ -44,6 +44,7 @@ def mock_providers(monkeypatch):
 
     monkeypatch.setattr(ideas, "portfolio_assets", lambda risk: [DummyAsset("SBER", "TQBR", "dividends")])
     monkeypatch.setattr(ideas, "_extra_candidates", lambda: [])
+    monkeypatch.setattr(ideas, "prefetch_submissions", lambda tickers: 0)
     monkeypatch.setattr(ideas, "get_quote", lambda ticker: DummyQuote())
     monkeypatch.setattr(ideas, "get_security_snapshot", lambda ticker: {"PE": "8.5", "DIVYIELD": "12.1"})
     monkeypatch.setattr(ideas, "get_security_history", lambda ticker, board, days=260: history_rows)
@@ -168,6 +169,7 @@ def test_generate_ideas_survives_key_rate_failure(monkeypatch):
 
     monkeypatch.setattr(ideas, "portfolio_assets", lambda risk: [DummyAsset("SBER", "TQBR", "dividends")])
     monkeypatch.setattr(ideas, "_extra_candidates", lambda: [])
+    monkeypatch.setattr(ideas, "prefetch_submissions", lambda tickers: 0)
     monkeypatch.setattr(ideas, "get_quote", lambda ticker: DummyQuote())
 
     def boom_snapshot(ticker: str):
@@ -188,3 +190,17 @@ def test_generate_ideas_survives_key_rate_failure(monkeypatch):
     generated = ideas.generate_ideas("balanced")
     assert generated  # no exception and at least one idea
     assert generated[0].ticker == "SBER"
+
+
+def test_build_security_idea_skips_stale_quote(monkeypatch):
+    stale = DummyQuote()
+    stale.ts_utc = (datetime.now(timezone.utc) - timedelta(days=365)).isoformat()
+    monkeypatch.setattr(ideas, "get_quote", lambda ticker: stale)
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("should not be called for stale quotes")
+
+    monkeypatch.setattr(ideas, "get_security_snapshot", unexpected)
+    monkeypatch.setattr(ideas, "get_security_history", unexpected)
+
+    assert ideas._build_security_idea("SBER", "TQBR", "dividends") is None
@@ -1,4 +1,9 @@
+import asyncio
+import math
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -7,24 +12,60 @@ import responses
 from app import providers
 from app.config import settings
 
+# ISS/API URL patterns shared by several tests.
+SBER_HISTORY_URL = re.compile(
+    r"https://iss\.moex\.com/iss/history/engines/stock/markets/shares/securities/SBER\.json.*"
+)
+TWELVEDATA_QUOTE_URL = re.compile(r"https://api\.twelvedata\.com/quote.*")
+SBER_TQBR_MARKETDATA_URL = re.compile(
+    r"https://iss\.moex\.com/iss/engines/stock/markets/shares/boards/TQBR/securities/SBER\.json.*"
+)
+
+
+_PROVIDER_CACHES = (
+    "_KEY_RATE_CACHE",
+    "_RUONIA_DOWN",
+    "_INDEX_CACHE",
+    "_COMMENTARY_CACHE",
+    "_SECURITY_CACHE",
+    "_BOARD_CACHE",
+    "_ROUTE_CACHE",
+    "_HISTORY_CACHE",
+    "_QUOTE_CACHE",
+    "_VALIDATOR_CACHE",
+    "_BOARD_ROWS_CACHE",
+)
+
+
+def _reset_providers() -> None:
+    for name in _PROVIDER_CACHES:
+        getattr(providers, name).clear()
+    responses.reset()
+
+
+def _stub_moex_security(ticker: str, lot: int, boards: list[list]) -> None:
+    """Register the ISS boards lookup and security description for ``ticker``."""
+
+    boards_table = {"columns": ["boardid", "is_traded", "market", "engine"], "data": boards}
+    security_url = rf"https://iss\.moex\.com/iss/securities/{ticker}\.json\?iss\.meta=off"
+    responses.add(
+        responses.GET, re.compile(security_url + r"&iss\.only=boards"), json={"boards": boards_table}
+    )
+    responses.add(
+        responses.GET,
+        re.compile(security_url),
+        json={
+            "securities": {"columns": ["SECID", "FACEUNIT", "LOTSIZE"], "data": [[ticker, "SUR", lot]]},
+            "boards": boards_table,
+        },
+    )
+
 
 @pytest.fixture(autouse=True)
 def clear_provider_caches():
-    providers._KEY_RATE_CACHE = None
-    providers._INDEX_CACHE.clear()
-    providers._SECURITY_CACHE.clear()
-    providers._BOARD_CACHE.clear()
-    providers._HISTORY_CACHE.clear()
-    providers._QUOTE_CACHE.clear()
-    responses.reset()
+    _reset_providers()
     yield
-    providers._KEY_RATE_CACHE = None
-    providers._INDEX_CACHE.clear()
-    providers._SECURITY_CACHE.clear()
-    providers._BOARD_CACHE.clear()
-    providers._HISTORY_CACHE.clear()
-    providers._QUOTE_CACHE.clear()
-    responses.reset()
+    _reset_providers()
 
 
 @responses.activate
@@ -57,39 +98,54 @@ def test_resolve_source_aggregator_for_delisted():
     assert route.symbol.endswith("YNDX.US")
 
 
+def test_resolve_source_caches_routes_but_not_outages(monkeypatch):
+    calls = []
+
+    def fake_boards(symbol):
+        calls.append(symbol)
+        if symbol == "GAZP":
+            raise providers.requests.RequestException("down")
+        return [{"boardid": "TQBR", "is_traded": 1, "market": "shares", "engine": "stock"}]
+
+    monkeypatch.setattr(providers, "_get_security_boards", fake_boards)
+
+    assert providers.resolve_source("SBER") is providers.resolve_source("sber")
+    assert providers.resolve_source("GAZP").reason == "moex_unavailable"
+    providers.resolve_source("GAZP")
+    assert calls == ["SBER", "GAZP", "GAZP"]
+
+
 @responses.activate
-def test_get_quote_moex_returns_price_and_metadata():
-    boards_payload = {
-        "boards": {
-            "columns": ["boardid", "is_traded", "market", "engine"],
-            "data": [["TQBR", 1, "shares", "stock"]],
-        }
-    }
-    securities_payload = {
-        "securities": {
-            "columns": ["SECID", "FACEUNIT", "LOTSIZE"],
-            "data": [["SBER", "SUR", 10]],
-        },
-        "boards": boards_payload["boards"],
-    }
-    responses.add(
-        responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/securities/SBER\.json\?iss\.meta=off&iss\.only=boards"
-        ),
-        json=boards_payload,
-    )
+def test_security_not_found_is_negatively_cached():
     responses.add(
         responses.GET,
-        re.compile(r"https://iss\.moex\.com/iss/securities/SBER\.json\?iss\.meta=off"),
-        json=securities_payload,
+        re.compile(r"https://iss\.moex\.com/iss/securities/NOPE\.json.*"),
+        status=404,
+        json={},
     )
+
+    for _ in range(2):
+        with pytest.raises(providers._NotFoundError):
+            providers._get_security_tables("nope")
+        with pytest.raises(providers._NotFoundError):
+            providers._get_security_boards("NOPE")
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_get_quote_moex_returns_price_and_metadata():
+    # The description stub (lot 1) is never fetched for a traded ticker: lot
+    # and currency come from the securities block of the marketdata request.
+    _stub_moex_security("SBER", lot=1, boards=[["TQBR", 1, "shares", "stock"]])
     responses.add(
         responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/engines/stock/markets/shares/boards/TQBR/securities/SBER\.json.*"
-        ),
+        SBER_TQBR_MARKETDATA_URL,
         json={
+            "securities": {
+                "columns": ["SECID", "BOARDID", "LOTSIZE", "FACEUNIT", "CURRENCYID"],
+                "data": [["SBER", "TQBR", 10, "SUR", "SUR"]],
+            },
             "marketdata": {
                 "columns": [
                     "BOARDID",
@@ -98,7 +154,6 @@ def test_get_quote_moex_returns_price_and_metadata():
                     "VALTODAY",
                     "LASTCHANGEPRCNT",
                     "SYSTIME",
-                    "LOTSIZE",
                 ],
                 "data": [
                     [
@@ -108,10 +163,9 @@ def test_get_quote_moex_returns_price_and_metadata():
                         4567890,
                         1.25,
                         "2024-10-01 12:00:00",
-                        10,
                     ]
                 ],
-            }
+            },
         },
     )
 
@@ -126,40 +180,118 @@ def test_get_quote_moex_returns_price_and_metadata():
     assert quote.value == pytest.approx(4567890)
     assert quote.change == pytest.approx(1.25)
     assert quote.ts_utc is not None
+    # Board lookup plus one combined securities+marketdata request.
+    assert len(responses.calls) == 2
 
 
-@responses.activate
-def test_get_quote_falls_back_to_daily_close():
-    boards_payload = {
-        "boards": {
-            "columns": ["boardid", "is_traded", "market", "engine"],
-            "data": [["TQBR", 1, "shares", "stock"]],
+def test_get_quotes_fetches_board_marketdata_once(monkeypatch):
+    calls = []
+
+    def fake_fetch(url, params=None):
+        calls.append((url, params["securities"]))
+        return {
+            "securities": [
+                {"SECID": "SBER", "LOTSIZE": 10, "FACEUNIT": "SUR"},
+                {"SECID": "GAZP", "LOTSIZE": 10, "FACEUNIT": "SUR"},
+            ],
+            "marketdata": [
+                {"SECID": "SBER", "BOARDID": "TQBR", "LAST": 250.5},
+                {"SECID": "GAZP", "BOARDID": "TQBR", "LAST": 160.1},
+            ],
         }
-    }
-    securities_payload = {
-        "securities": {
-            "columns": ["SECID", "FACEUNIT", "LOTSIZE"],
-            "data": [["SBER", "SUR", 10]],
-        },
-        "boards": boards_payload["boards"],
-    }
-    responses.add(
-        responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/securities/SBER\.json\?iss\.meta=off&iss\.only=boards"
+
+    def unexpected_security_tables(ticker):
+        raise AssertionError("batched quotes must not fetch per-ticker descriptions")
+
+    monkeypatch.setattr(
+        providers,
+        "resolve_source",
+        lambda ticker: providers.SourceRoute(
+            name="MOEX", symbol=ticker, board="TQBR", market="shares", engine="stock", is_traded=True
         ),
-        json=boards_payload,
     )
-    responses.add(
-        responses.GET,
-        re.compile(r"https://iss\.moex\.com/iss/securities/SBER\.json\?iss\.meta=off"),
-        json=securities_payload,
+    monkeypatch.setattr(providers, "_get_security_tables", unexpected_security_tables)
+    monkeypatch.setattr(providers, "_fetch_moex_tables", fake_fetch)
+
+    quotes = providers.get_quotes(["sber", "GAZP", "SBER"])
+
+    assert list(quotes) == ["SBER", "GAZP"]
+    assert quotes["SBER"].price == pytest.approx(250.5)
+    assert quotes["GAZP"].price == pytest.approx(160.1)
+    assert quotes["SBER"].lot == 10
+    # Each batched quote is cached, so a single lookup afterwards stays offline.
+    assert providers.get_quote("GAZP") is quotes["GAZP"]
+    assert calls == [
+        (
+            "https://iss.moex.com/iss/engines/stock/markets/shares/boards/TQBR/securities.json",
+            "GAZP,SBER",
+        )
+    ]
+
+
+def test_get_quotes_replaces_stale_quote_with_batched_row(monkeypatch):
+    calls = []
+
+    def fake_fetch(url, params=None):
+        calls.append(params["securities"])
+        return {
+            "securities": [{"SECID": "SBER", "LOTSIZE": 10, "FACEUNIT": "SUR"}],
+            "marketdata": [{"SECID": "SBER", "BOARDID": "TQBR", "LAST": 2.0}],
+        }
+
+    route = providers.SourceRoute(
+        name="MOEX", symbol="SBER", board="TQBR", market="shares", engine="stock", is_traded=True
+    )
+    monkeypatch.setattr(providers, "resolve_source", lambda ticker: route)
+    monkeypatch.setattr(providers, "_fetch_moex_tables", fake_fetch)
+    monkeypatch.setattr(
+        providers,
+        "_refresh_in_background",
+        lambda *args: pytest.fail("batched quotes must not schedule a second refresh"),
     )
+    stale = providers.Quote(ticker="SBER", price=1.0, currency="RUB", ts_utc=None, source="MOEX")
+    providers._QUOTE_CACHE.set("MOEX:SBER", stale, ttl=-1)
+
+    quotes = providers.get_quotes(["SBER"])
+
+    assert quotes["SBER"].price == pytest.approx(2.0)
+    assert providers._QUOTE_CACHE.get("MOEX:SBER").price == pytest.approx(2.0)
+    assert calls == ["SBER"]
+
+
+def test_get_quotes_isolates_failing_ticker(monkeypatch):
+    def fake_quote(ticker):
+        if ticker == "YNDX":
+            raise ConnectionError("connection reset")
+        return providers.Quote(ticker=ticker, price=100.0, currency="RUB", ts_utc=None, source="MOEX")
+
+    monkeypatch.setattr(
+        providers, "resolve_source", lambda ticker: providers.SourceRoute(name="AGGREGATOR", symbol=ticker)
+    )
+    monkeypatch.setattr(providers, "get_quote", fake_quote)
+
+    quotes = providers.get_quotes(["SBER", "YNDX", "GAZP"])
+
+    assert list(quotes) == ["SBER", "GAZP"]
+
+
+def test_prefetch_quotes_counts_loaded_and_swallows_errors(monkeypatch):
+    monkeypatch.setattr(providers, "get_quotes", lambda tickers: {t: object() for t in tickers})
+    assert providers.prefetch_quotes(["SBER", "GAZP"]) == 2
+
+    def boom(tickers):
+        raise providers.requests.RequestException("down")
+
+    monkeypatch.setattr(providers, "get_quotes", boom)
+    assert providers.prefetch_quotes(["SBER"]) == 0
+
+
+@responses.activate
+def test_get_quote_falls_back_to_daily_close():
+    _stub_moex_security("SBER", lot=10, boards=[["TQBR", 1, "shares", "stock"]])
     responses.add(
         responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/engines/stock/markets/shares/boards/TQBR/securities/SBER\.json.*"
-        ),
+        SBER_TQBR_MARKETDATA_URL,
         json={
             "marketdata": {
                 "columns": ["BOARDID", "SYSTIME"],
@@ -186,61 +318,93 @@ def test_get_quote_falls_back_to_daily_close():
     assert quote.reason == "eod_close_fallback"
 
 
-@responses.activate
-def test_get_quote_aggregator_without_keys(monkeypatch):
-    monkeypatch.delenv("TWELVEDATA_API_KEY", raising=False)
-    monkeypatch.delenv("FINNHUB_API_KEY", raising=False)
-    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", "")
-    monkeypatch.setattr(settings, "FINNHUB_API_KEY", "")
+def test_quote_ttl_follows_session_and_volatility():
+    base = providers.Quote(ticker="SBER", price=250.0, currency="RUB", ts_utc=None, source="MOEX")
 
+    assert providers._quote_ttl(base) == providers._CACHE_TTL
+    assert providers._quote_ttl(
+        replace(base, reason="eod_close_fallback")
+    ) >= providers._OFF_SESSION_QUOTE_TTL
+    assert providers._quote_ttl(replace(base, change=-10.0)) < providers._CACHE_TTL
+
+
+@responses.activate
+def test_fetch_twelvedata_quote_raises_on_unauthorized(monkeypatch):
+    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", "invalid-key")
     responses.add(
         responses.GET,
-        re.compile(r"https://api\.twelvedata\.com/quote.*"),
+        TWELVEDATA_QUOTE_URL,
         status=401,
         json={"status": "error", "code": 401, "message": "Unauthorized"},
     )
-
-    def _fail_finnhub(*args, **kwargs):
-        raise AssertionError("Finnhub should not be called")
-
-    monkeypatch.setattr(providers, "_fetch_finnhub_quote", _fail_finnhub)
-
     route = providers.resolve_source("YNDX")
 
-    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", "invalid-key")
     with pytest.raises(providers.AggregatorAuthError):
         providers._fetch_twelvedata_quote("YNDX", route)
-
-    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", "")
-
-    quote = providers.get_quote("YNDX")
-
-    assert quote.source == "TWELVEDATA"
-    assert quote.price is None
-    assert quote.reason == "missing_api_key"
-    assert quote.context == "moex_delisting_announced"
     assert len(responses.calls) == 1
 
 
+@pytest.mark.parametrize(
+    ("twelvedata_key", "finnhub_key", "http_calls"),
+    [("", "", 0), ("bad-key", "fallback-key", 1)],
+    ids=["without_keys", "twelvedata_unauthorized"],
+)
 @responses.activate
-def test_get_quote_aggregator_twelvedata_unauthorized(monkeypatch):
-    monkeypatch.setattr(providers.settings, "TWELVEDATA_API_KEY", "bad-key")
-    monkeypatch.setattr(providers.settings, "FINNHUB_API_KEY", "fallback-key")
-
+def test_get_quote_aggregator_reports_missing_key(
+    monkeypatch, twelvedata_key, finnhub_key, http_calls
+):
+    monkeypatch.delenv("TWELVEDATA_API_KEY", raising=False)
+    monkeypatch.delenv("FINNHUB_API_KEY", raising=False)
+    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", twelvedata_key)
+    monkeypatch.setattr(settings, "FINNHUB_API_KEY", finnhub_key)
     responses.add(
         responses.GET,
-        re.compile(r"https://api\.twelvedata\.com/quote.*"),
+        TWELVEDATA_QUOTE_URL,
         status=401,
         json={"status": "error", "code": 401, "message": "Unauthorized"},
     )
+    if not finnhub_key:
+
+        def _fail_finnhub(*args, **kwargs):
+            raise AssertionError("Finnhub should not be called")
+
+        monkeypatch.setattr(providers, "_fetch_finnhub_quote", _fail_finnhub)
 
     quote = providers.get_quote("YNDX")
 
     assert quote.source == "TWELVEDATA"
-    assert quote.reason == "missing_api_key"
     assert quote.price is None
+    assert quote.reason == "missing_api_key"
     assert quote.context == "moex_delisting_announced"
-    assert len(responses.calls) == 1
+    assert len(responses.calls) == http_calls
+
+
+def test_get_quote_aggregator_queries_finnhub_concurrently(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(settings, "TWELVEDATA_API_KEY", "td-key")
+    monkeypatch.setattr(settings, "FINNHUB_API_KEY", "fh-key")
+    route = providers.SourceRoute(name="AGGREGATOR", symbol="YNDX", reason="moex_delisting_announced", currency="USD")
+    finnhub_started = threading.Event()
+
+    def _twelvedata(ticker, route):
+        assert finnhub_started.wait(2), "Finnhub should start before Twelve Data finishes"
+        raise providers.MarketDataError("no data")
+
+    def _finnhub(ticker, route):
+        finnhub_started.set()
+        return providers.Quote(ticker=ticker, price=10.0, currency="USD", ts_utc=None, source="FINNHUB")
+
+    monkeypatch.setattr(providers, "_fetch_twelvedata_quote", _twelvedata)
+    monkeypatch.setattr(providers, "_fetch_finnhub_quote", _finnhub)
+
+    quote = providers._get_aggregator_quote("YNDX", route)
+    assert quote.source == "FINNHUB"
+    assert quote.price == 10.0
+
+    preferred = providers.Quote(ticker="YNDX", price=11.0, currency="USD", ts_utc=None, source="TWELVEDATA")
+    monkeypatch.setattr(providers, "_fetch_twelvedata_quote", lambda ticker, route: preferred)
+    assert providers._get_aggregator_quote("YNDX", route).source == "TWELVEDATA"
 
 
 @responses.activate
@@ -272,33 +436,8 @@ def test_resolve_source_prefers_mtqr_for_fx():
 
 @responses.activate
 def test_get_quote_fx_uses_mtqr_board():
-    boards_payload = {
-        "boards": {
-            "columns": ["boardid", "is_traded", "market", "engine"],
-            "data": [
-                ["TQTF", 0, "shares", "stock"],
-                ["MTQR", 1, "shares", "otc"],
-            ],
-        }
-    }
-    securities_payload = {
-        "securities": {
-            "columns": ["SECID", "FACEUNIT", "LOTSIZE"],
-            "data": [["FXIT", "SUR", 1]],
-        },
-        "boards": boards_payload["boards"],
-    }
-    responses.add(
-        responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/securities/FXIT\.json\?iss\.meta=off&iss\.only=boards"
-        ),
-        json=boards_payload,
-    )
-    responses.add(
-        responses.GET,
-        re.compile(r"https://iss\.moex\.com/iss/securities/FXIT\.json\?iss\.meta=off"),
-        json=securities_payload,
+    _stub_moex_security(
+        "FXIT", lot=1, boards=[["TQTF", 0, "shares", "stock"], ["MTQR", 1, "shares", "otc"]]
     )
     responses.add(
         responses.GET,
@@ -325,33 +464,8 @@ def test_get_quote_fx_uses_mtqr_board():
 
 @responses.activate
 def test_get_quote_fx_history_when_inactive():
-    boards_payload = {
-        "boards": {
-            "columns": ["boardid", "is_traded", "market", "engine"],
-            "data": [
-                ["TQTF", 0, "shares", "stock"],
-                ["MTQR", 0, "shares", "otc"],
-            ],
-        }
-    }
-    securities_payload = {
-        "securities": {
-            "columns": ["SECID", "FACEUNIT", "LOTSIZE"],
-            "data": [["FXGD", "SUR", 1]],
-        },
-        "boards": boards_payload["boards"],
-    }
-    responses.add(
-        responses.GET,
-        re.compile(
-            r"https://iss\.moex\.com/iss/securities/FXGD\.json\?iss\.meta=off&iss\.only=boards"
-        ),
-        json=boards_payload,
-    )
-    responses.add(
-        responses.GET,
-        re.compile(r"https://iss\.moex\.com/iss/securities/FXGD\.json\?iss\.meta=off"),
-        json=securities_payload,
+    _stub_moex_security(
+        "FXGD", lot=1, boards=[["TQTF", 0, "shares", "stock"], ["MTQR", 0, "shares", "otc"]]
     )
     responses.add(
         responses.GET,
@@ -420,6 +534,88 @@ def test_get_key_rate_falls_back_to_cbr():
     assert len(responses.calls) == 2
 
 
+@pytest.mark.parametrize(
+    ("ruonia", "cbr", "fallback", "expected"),
+    [
+        (0.135, 0.16, 0.12, 0.135),
+        (None, 0.16, 0.12, 0.16),
+        (None, None, 0.12, 0.12),
+    ],
+    ids=["ruonia", "cbr", "configured"],
+)
+def test_get_key_rate_source_chain(monkeypatch, ruonia, cbr, fallback, expected):
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", lambda: ruonia)
+    monkeypatch.setattr(providers, "_fetch_cbr_key_rate", lambda: cbr)
+    monkeypatch.setattr(providers.settings, "KEY_RATE_FALLBACK", fallback)
+
+    assert providers.get_key_rate() == expected
+
+
+def test_get_key_rate_keeps_fallback_out_of_disk_cache(monkeypatch, tmp_path):
+    from app._disk_cache import DiskCache
+
+    disk = DiskCache(tmp_path / "cache.db")
+    monkeypatch.setattr(providers, "_DISK_CACHE", disk)
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", lambda: None)
+    monkeypatch.setattr(providers, "_fetch_cbr_key_rate", lambda: None)
+    monkeypatch.setattr(providers.settings, "KEY_RATE_FALLBACK", 0.12)
+
+    assert providers.get_key_rate() == 0.12
+    assert disk.get(("key_rate",)) is None
+    assert providers._KEY_RATE_CACHE._data["key_rate"][0] <= time.monotonic() + providers._KEY_RATE_RETRY_TTL
+
+
+def test_get_key_rate_prefers_stale_rate_over_fallback(monkeypatch):
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", lambda: None)
+    monkeypatch.setattr(providers, "_fetch_cbr_key_rate", lambda: None)
+    monkeypatch.setattr(providers.settings, "KEY_RATE_FALLBACK", 0.12)
+    providers._KEY_RATE_CACHE.set("key_rate", 0.21, ttl=-providers._STALE_GRACE)
+
+    assert providers.get_key_rate() == 0.21
+
+
+def test_get_key_rate_falls_back_when_cbr_serves_html(monkeypatch):
+    class FakeResponse:
+        status_code = 200
+        content = b"<html><body>Service temporarily unavailable</body></html>"
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", lambda: None)
+    monkeypatch.setattr(providers, "_http_get", lambda url, params=None, headers=None: FakeResponse())
+    monkeypatch.setattr(providers.settings, "KEY_RATE_FALLBACK", 0.12)
+
+    assert providers.get_key_rate() == 0.12
+
+
+def test_get_key_rate_serves_stale_and_refreshes(monkeypatch):
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", lambda: 0.2)
+    providers._KEY_RATE_CACHE.set("key_rate", 0.1, ttl=-1)
+
+    assert providers.get_key_rate() == 0.1
+    deadline = time.monotonic() + 2
+    while providers._KEY_RATE_CACHE.get("key_rate") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert providers._KEY_RATE_CACHE.get("key_rate") == 0.2
+
+
+def test_get_key_rate_skips_ruonia_after_recent_failure(monkeypatch):
+    ruonia_calls = []
+
+    def failing_ruonia():
+        ruonia_calls.append(1)
+        return None
+
+    monkeypatch.setattr(providers, "_fetch_ruonia_key_rate", failing_ruonia)
+    monkeypatch.setattr(providers, "_fetch_cbr_key_rate", lambda: 0.17)
+
+    assert providers.get_key_rate() == 0.17
+    providers._KEY_RATE_CACHE.clear()
+    assert providers.get_key_rate() == 0.17
+    assert len(ruonia_calls) == 1
+
+
 @responses.activate
 def test_get_index_value_parses_payload():
     responses.add(
@@ -437,11 +633,41 @@ def test_get_index_value_parses_payload():
     assert len(responses.calls) == 1
 
 
+def test_get_index_value_single_flight(monkeypatch):
+    calls = []
+
+    def slow_fetch(url, params=None):
+        calls.append(url)
+        time.sleep(0.05)
+        return {"securities": [{"CURRENTVALUE": "100.0"}]}
+
+    monkeypatch.setattr(providers, "_fetch_moex_tables", slow_fetch)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda _: providers.get_index_value("RTSI"), range(8)))
+    assert values == [100.0] * 8
+    assert len(calls) == 1
+
+
+def test_get_index_value_serves_stale_and_refreshes(monkeypatch):
+    monkeypatch.setattr(
+        providers,
+        "_fetch_moex_tables",
+        lambda url, params=None: {"securities": [{"CURRENTVALUE": "2.0"}]},
+    )
+    providers._INDEX_CACHE.set("MOEXBC", 1.0, ttl=-1)
+
+    assert providers.get_index_value("MOEXBC") == 1.0
+    deadline = time.monotonic() + 2
+    while providers._INDEX_CACHE.get("MOEXBC") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert providers._INDEX_CACHE.get("MOEXBC") == 2.0
+
+
 @responses.activate
 def test_get_security_history_aggregates_rows():
     responses.add(
         responses.GET,
-        re.compile(r"https://iss\.moex\.com/iss/history/engines/stock/markets/shares/securities/SBER\.json.*"),
+        SBER_HISTORY_URL,
         json={
             "history": [
                 {"TRADEDATE": "2024-09-01", "CLOSE": 250, "VOLUME": 1000, "VALUE": 100000},
@@ -454,3 +680,254 @@ def test_get_security_history_aggregates_rows():
     assert history[0]["TRADEDATE"] == "2024-09-01"
     providers.get_security_history("SBER", "TQBR", days=5)
     assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_get_security_history_probes_markets_in_preference_order():
+    history_url = r"https://iss\.moex\.com/iss/history/engines/stock/markets/{market}/securities/FXGD\.json.*"
+    responses.add(
+        responses.GET,
+        re.compile(history_url.format(market="etf")),
+        json={"history": [{"TRADEDATE": "2024-09-01", "CLOSE": 1.5, "VOLUME": 10, "VALUE": 15}]},
+    )
+    responses.add(
+        responses.GET,
+        re.compile(history_url.format(market="bonds")),
+        json={"history": [{"TRADEDATE": "2024-09-01", "CLOSE": 99.0, "VOLUME": 1, "VALUE": 99}]},
+    )
+    responses.add(responses.GET, re.compile(r"https://iss\.moex\.com/iss/history/.*"), json={"history": []})
+
+    history = providers.get_security_history("FXGD", "UNKNOWN", days=5)
+    assert [row["CLOSE"] for row in history] == [1.5]
+
+
+@responses.activate
+def test_aget_security_history_runs_off_loop():
+    responses.add(
+        responses.GET,
+        re.compile(r"https://iss\.moex\.com/iss/history/engines/stock/markets/shares/securities/GAZP\.json.*"),
+        json={"history": [{"TRADEDATE": "2024-09-01", "CLOSE": 150, "VOLUME": 10, "VALUE": 1500}]},
+    )
+    history = asyncio.run(providers.aget_security_history("GAZP", "TQBR", days=5))
+    assert history[0]["CLOSE"] == 150
+
+
+@responses.activate
+def test_get_security_history_reads_disk_cache(monkeypatch, tmp_path):
+    from app._disk_cache import DiskCache
+
+    monkeypatch.setattr(providers, "_DISK_CACHE", DiskCache(tmp_path / "cache.db"))
+    responses.add(
+        responses.GET,
+        SBER_HISTORY_URL,
+        json={"history": [{"TRADEDATE": "2024-09-01", "CLOSE": 250, "VOLUME": 1000, "VALUE": 100000}]},
+    )
+    providers.get_security_history("SBER", "TQBR", days=5)
+    providers._HISTORY_CACHE.clear()
+
+    history = providers.get_security_history("SBER", "TQBR", days=5)
+    assert history[0]["CLOSE"] == 250
+    assert len(responses.calls) == 1
+
+
+def test_get_security_history_refresh_bypasses_disk_cache(monkeypatch, tmp_path):
+    from app._disk_cache import DiskCache
+
+    disk = DiskCache(tmp_path / "cache.db")
+    monkeypatch.setattr(providers, "_DISK_CACHE", disk)
+    key = ("SBER", "TQBR", 5)
+    old = [{"TRADEDATE": "2024-09-01", "CLOSE": 250}]
+    disk.set(("history",) + key, old, ttl=3600)
+    providers._HISTORY_CACHE.set(key, old, ttl=-1)
+    fresh = [{"TRADEDATE": "2024-09-02", "CLOSE": 260}]
+    monkeypatch.setattr(providers, "_fetch_history_page", lambda *args: list(fresh))
+
+    assert providers.get_security_history("SBER", "TQBR", days=5) == old
+    deadline = time.monotonic() + 2
+    while providers._HISTORY_CACHE.get(key) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert providers._HISTORY_CACHE.get(key) == fresh
+
+
+def test_disk_cache_hit_keeps_its_remaining_lifetime(monkeypatch, tmp_path):
+    from app._disk_cache import DiskCache
+
+    disk = DiskCache(tmp_path / "cache.db")
+    monkeypatch.setattr(providers, "_DISK_CACHE", disk)
+    disk.set(("index", "IMOEX"), 3100.0, ttl=5)
+
+    assert providers.get_index_value("IMOEX") == 3100.0
+    assert providers._INDEX_CACHE._data["IMOEX"][0] <= time.monotonic() + 5
+
+
+def test_get_index_value_survives_restart_via_disk_cache(monkeypatch, tmp_path):
+    from app._disk_cache import DiskCache
+
+    monkeypatch.setattr(providers, "_DISK_CACHE", DiskCache(tmp_path / "cache.db"))
+    calls = []
+
+    def fake_fetch(url, params=None):
+        calls.append(url)
+        return {"securities": [{"CURRENTVALUE": "3100.0"}]}
+
+    monkeypatch.setattr(providers, "_fetch_moex_tables", fake_fetch)
+    assert providers.get_index_value("IMOEX") == 3100.0
+    providers._INDEX_CACHE.clear()
+
+    assert providers.get_index_value("IMOEX") == 3100.0
+    assert len(calls) == 1
+
+
+def test_get_security_history_arrays_is_columnar(monkeypatch):
+    monkeypatch.setattr(
+        providers,
+        "get_security_history",
+        lambda ticker, board, days=260: [
+            {"TRADEDATE": "2024-09-02", "CLOSE": 250.0, "VOLUME": 10, "VALUE": 2500},
+            {"TRADEDATE": "2024-09-03", "CLOSE": None, "LEGALCLOSEPRICE": "251,5", "VOLUME": None},
+        ],
+    )
+
+    arrays = providers.get_security_history_arrays("SBER", "TQBR")
+
+    assert arrays["TRADEDATE"].dtype.kind == "M"
+    assert str(arrays["TRADEDATE"][1]) == "2024-09-03"
+    assert arrays["CLOSE"].tolist() == [250.0, 251.5]
+    assert arrays["VOLUME"][0] == 10
+    assert math.isnan(arrays["VOLUME"][1])
+
+
+def test_parse_iss_tables_builds_row_views():
+    tables = providers._parse_iss_tables(
+        {"marketdata": {"columns": ["SECID", "LAST"], "data": [["SBER", 250.5], ["GAZP", 150.0]]}}
+    )
+    rows = tables["marketdata"]
+    assert rows[0]["LAST"] == 250.5
+    assert rows[1].get("SECID") == "GAZP"
+    assert rows[1].get("MISSING") is None
+    assert dict(rows[0]) == {"SECID": "SBER", "LAST": 250.5}
+
+
+def test_get_market_commentary_matches_keys_case_insensitively(monkeypatch):
+    monkeypatch.setattr(
+        providers,
+        "_fetch_moex_tables",
+        lambda url, params=None: {
+            "analytics": [{"TITLE": "Рынок растёт", "Href": "https://moex.com/a", "brief": "кратко"}]
+        },
+    )
+    commentary = providers.get_market_commentary()
+    assert commentary == {
+        "title": "Рынок растёт",
+        "source": "MOEX",
+        "summary": "кратко",
+        "url": "https://moex.com/a",
+    }
+
+    def no_refetch(url, params=None):
+        raise AssertionError("commentary should be served from cache")
+
+    monkeypatch.setattr(providers, "_fetch_moex_tables", no_refetch)
+    assert providers.get_market_commentary() == commentary
+
+
+def test_fetch_dashboard_gathers_parts_and_tolerates_failures(monkeypatch):
+    def quote_for(ticker):
+        if ticker == "BAD":
+            raise providers.MarketDataError("no quote")
+        return providers.Quote(ticker=ticker, price=100.0, currency="SUR", ts_utc=None, source="MOEX")
+
+    def no_index(name):
+        raise providers.MarketDataError("index down")
+
+    monkeypatch.setattr(providers, "get_key_rate", lambda: 0.16)
+    monkeypatch.setattr(providers, "get_index_value", no_index)
+    monkeypatch.setattr(providers, "get_market_commentary", lambda: None)
+    monkeypatch.setattr(providers, "get_quote", quote_for)
+
+    snapshot = asyncio.run(providers.fetch_dashboard(["sber", "BAD", "SBER"]))
+    assert snapshot.key_rate == 0.16
+    assert snapshot.index_value is None
+    assert list(snapshot.quotes) == ["SBER"]
+
+
+def test_fetch_moex_tables_revalidates_with_etag(monkeypatch):
+    class FakeResponse:
+        def __init__(self, status_code, payload=None, headers=None):
+            self.status_code = status_code
+            self._payload = payload
+            self.headers = headers or {}
+
+        def json(self):
+            return self._payload
+
+        def raise_for_status(self):
+            pass
+
+    sent_headers = []
+    replies = [
+        FakeResponse(200, {"history": [{"CLOSE": 1.0}]}, {"ETag": '"v1"'}),
+        FakeResponse(304),
+    ]
+
+    def fake_http_get(url, params=None, headers=None):
+        sent_headers.append(headers)
+        return replies.pop(0)
+
+    monkeypatch.setattr(providers, "_http_get", fake_http_get)
+    first = providers._fetch_moex_tables("https://iss.moex.com/iss/x.json", {"iss.meta": "off"})
+    second = providers._fetch_moex_tables("https://iss.moex.com/iss/x.json", {"iss.meta": "off"})
+    assert second == first
+    assert sent_headers == [None, {"If-None-Match": '"v1"'}]
+
+
+def test_fetch_moex_tables_coalesces_concurrent_requests(monkeypatch):
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+        headers = {}
+
+        def json(self):
+            return {"securities": [{"SECID": "SBER"}]}
+
+        def raise_for_status(self):
+            pass
+
+    def slow_http_get(url, params=None, headers=None):
+        calls.append(url)
+        time.sleep(0.05)
+        return FakeResponse()
+
+    monkeypatch.setattr(providers, "_http_get", slow_http_get)
+    url = "https://iss.moex.com/iss/securities/SBER.json"
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: providers._fetch_moex_tables(url, {"iss.meta": "off"}), range(6)))
+    assert len(calls) == 1
+    assert all(result["securities"][0]["SECID"] == "SBER" for result in results)
+    assert providers._TABLE_FETCHES == {}
+
+
+def test_http_get_retries_server_errors_but_not_client_errors(monkeypatch):
+    from tenacity import wait_none
+
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    statuses = []
+
+    def fake_get(url, params=None, headers=None, timeout=None):
+        statuses.append(url)
+        return FakeResponse(503 if "down" in url else 404)
+
+    monkeypatch.setattr(providers._http_get.retry, "wait", wait_none())
+    monkeypatch.setattr(providers.requests, "get", fake_get)
+
+    with pytest.raises(providers.requests.HTTPError):
+        providers._http_get("https://iss.moex.com/down.json")
+    assert len(statuses) == 3
+
+    statuses.clear()
+    assert providers._http_get("https://iss.moex.com/missing.json").status_code == 404
+    assert len(statuses) == 1
@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+
+from app import scheduler
+
+
+def test_send_all_delivers_concurrently_and_survives_failures(monkeypatch):
+    monkeypatch.setattr(scheduler, "_SEND_CONCURRENCY", 2)
+    active = 0
+    peak = 0
+    sent = []
+
+    async def send_message(chat_id, text):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if chat_id == 2:
+            raise RuntimeError("blocked by user")
+        sent.append((chat_id, text))
+
+    app = SimpleNamespace(bot=SimpleNamespace(send_message=send_message))
+    asyncio.run(scheduler._send_all(app, [(chat_id, f"hi {chat_id}") for chat_id in range(5)]))
+
+    assert sorted(sent) == [(0, "hi 0"), (1, "hi 1"), (3, "hi 3"), (4, "hi 4")]
+    assert peak == 2
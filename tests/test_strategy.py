@@ -1,4 +1,3 @@
-from datetime import datetime
 from pathlib import Path
 
 import pytest
@@ -8,6 +7,8 @@ from app.brokers import tinkoff_filter
 from app.config import settings
 from app.providers import Quote
 
+_QUOTE_TS = "2024-10-01T12:00:00Z"
+
 
 @pytest.fixture(autouse=True)
 def reset_filter_cache():
@@ -35,19 +36,22 @@ def test_propose_allocation_marks_unavailable(monkeypatch, tmp_path: Path):
 
     requested: list[str] = []
 
-    def fake_quote(ticker: str) -> Quote:
-        requested.append(ticker.upper())
-        return Quote(
-            ticker=ticker.upper(),
-            price=245.5,
-            currency="RUB",
-            ts_utc=datetime.utcnow().isoformat() + "Z",
-            source="MOEX",
-            board="TQBR",
-            lot=10,
-        )
-
-    monkeypatch.setattr(strategy, "get_quote", fake_quote)
+    def fake_quotes(tickers) -> dict[str, Quote]:
+        quotes = {}
+        for ticker in tickers:
+            requested.append(ticker.upper())
+            quotes[ticker.upper()] = Quote(
+                ticker=ticker.upper(),
+                price=245.5,
+                currency="RUB",
+                ts_utc=_QUOTE_TS,
+                source="MOEX",
+                board="TQBR",
+                lot=10,
+            )
+        return quotes
+
+    monkeypatch.setattr(strategy, "get_quotes", fake_quotes)
 
     advice = strategy.propose_allocation(10_000, "balanced")
 
@@ -66,3 +70,23 @@ def test_propose_allocation_marks_unavailable(monkeypatch, tmp_path: Path):
     assert "ROSN" not in requested
     assert "FXUS" not in requested
     assert "SBER" in requested
+
+    sber = next(line for line in advice.plan if line.ticker == "SBER")
+    assert sber.quote is not None and sber.quote.price == 245.5
+    assert sber.lots is not None
+
+
+def test_split_amount_uses_largest_remainders():
+    assert strategy._split_amount([0.5, 0.3, 0.2], 10) == [5, 3, 2]
+    # 33.33.. each: the single leftover rouble goes to the first of the tied lines.
+    assert strategy._split_amount([1 / 3, 1 / 3, 1 / 3], 100) == [34, 33, 33]
+    assert strategy._split_amount([0.15, 0.85], 7) == [1, 6]
+    assert sum(strategy._split_amount([0.1] * 9 + [0.1 + 1e-12], 12_345)) == 12_345
+
+
+def test_buy_lots_matches_kopeck_and_fractional_prices():
+    assert strategy._buy_lots(33, 1.1, 3) == (10, 33.0, 0.0)
+    assert strategy._buy_lots(10_000, 245.5, 10) == (4, 9820.0, 180.0)
+    assert strategy._buy_lots(1_000, 0.0125, 1000) == (80, 1000.0, 0.0)
+    assert strategy._buy_lots(1_000, 0.01234, 1000) == (81, 999.54, 0.46)
+    assert strategy._buy_lots(1_000, 10.0, -1) is None
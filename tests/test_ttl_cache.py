@@ -0,0 +1,77 @@
+from app._ttl_cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_but_remain_available_as_stale():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=4, ttl=10, timer=timer)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    timer.now = 10.0
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.get_stale("a") == 1
+
+
+def test_lru_eviction_prefers_expired_then_oldest():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+    timer.now = 5.0
+    cache.set("new", 3)
+    assert cache.get_stale("short") is None
+    assert cache.get("long") == 2
+
+    cache.get("long")
+    cache.set("newest", 4)
+    assert cache.get("new") is None
+    assert cache.get("long") == 2
+    assert len(cache) == 2
+
+
+def test_concurrent_writers_respect_maxsize():
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = TTLCache(maxsize=50, ttl=60)
+
+    def hammer(worker):
+        for i in range(500):
+            cache.set((worker, i), i)
+            cache.get((worker, i - 1))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(hammer, range(8)))
+    assert len(cache) == 50
+
+
+def test_reads_do_not_wait_for_writers():
+    import threading
+
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    held = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with cache._lock:
+            held.set()
+            release.wait(2)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    held.wait(2)
+    try:
+        assert cache.get("a") == 1
+        assert cache.lookup("a") == (1, False)
+    finally:
+        release.set()
+        thread.join()